@@ -0,0 +1,422 @@
+#####################################################
+## Benchmarks for the encoding
+## run: python benchmarks.py [list|bounded|seq]
+##
+## The explicit-state checks of lts.py on the dining
+## philosophers took, on one core of the machine they
+## were measured on, for the deadlock and the fixed
+## deadlock free college:
+##   N=8   0.3s  0.8s
+##   N=9   1.2s  3.3s
+##   N=10  4.8s 12.7s
+## and 7.1s for TRef against RUN |~| PAR at N=9. The
+## states triple with each philosopher, e.g., 102571
+## for the fixed college of 10. The time goes into
+## composing the states of Par, i.e., initials_Par and
+## hash-consing their terms, not into the normal form.
+#####################################################
+
+import sys
+import io
+import contextlib
+import timeit
+import random
+import init
+
+# the encoding of traces, see list.py
+if len(sys.argv) > 1:
+    init.trace_encoding = sys.argv[1]
+
+import csp
+import term
+import lts
+import chc
+import finite_set
+import model
+from csp import *
+
+
+#####################################################
+## sequential composition
+## a deep right-nested sequence a->b->c->d->a->...->Skip
+## built with fresh instances of Q (current) and with
+## the former eval(Q.expr) rebuilding (before)
+#####################################################
+
+# the former way to get a new copy of Q in P;Q
+def rebuild(Q):
+    return eval(Q.expr, vars(csp))
+
+# whether P can terminate, without printing the trace
+def terminates(P):
+    s = P.ctx.solver
+    s.push()
+    s.add(P.ctx.cone([P]))
+    s.add(And(P.relation(P.iv, P.fv), P.iv == init, ok(P.fv), Not(wait(P.fv))))
+    result = s.check()
+    s.pop()
+    return result == sat
+
+def deep_sequence(n):
+    events = Set.alphabet
+    P = Skip
+    for i in reversed(range(n)):
+        P = Seq(SP(events[i % len(events)]), P)
+    return P
+
+def sequence_growth(copy, depths):
+    csp.instance = copy
+    for n in depths:
+        with CheckContext() as ctx:
+            start = timeit.default_timer()
+            P = deep_sequence(n)
+            build = timeit.default_timer() - start
+            axioms = sum([len(Q.axioms) for Q in ctx.processes.values()])
+            cone = len(ctx.cone([P]))
+
+            start = timeit.default_timer()
+            terminates(P)
+            check = timeit.default_timer() - start
+            print("%8d %10d %10d %10d %10.3f %10.3f" % (n, len(ctx.processes), axioms, cone, build, check))
+    csp.instance = instance
+
+
+#####################################################
+## repeated sub-processes
+## a choice among n sequences of the prefixes of the
+## alphabet, built by the combinators (before) and
+## encoded from hash-consed terms (after); with 32
+## branches, the check took 152s before and 3.6s after
+## in the list encoding
+#####################################################
+
+def choices(lib, n):
+    events = Set.alphabet
+    P = lib.Seq(lib.SP(events[0]), lib.SP(events[1]))
+    for i in range(1, n):
+        P = lib.EC(lib.Seq(lib.SP(events[i % len(events)]), lib.SP(events[(i + 1) % len(events)])), P)
+    return P
+
+def repeated_growth(build, sizes):
+    for n in sizes:
+        with CheckContext() as ctx:
+            start = timeit.default_timer()
+            P = build(n)
+            build_time = timeit.default_timer() - start
+            axioms = sum([len(Q.axioms) for Q in ctx.processes.values()])
+            cone = len(ctx.cone([P]))
+
+            start = timeit.default_timer()
+            terminates(P)
+            check = timeit.default_timer() - start
+            print("%8d %10d %10d %10d %10.3f %10.3f" % (n, len(ctx.processes), axioms, cone, build_time, check))
+
+
+#####################################################
+## lazy unfolding of recursion
+## Z = a->Z [] b->Z unfolded r rounds by term.py: the
+## occurrences of Z after an event share one process,
+## so a round adds the same processes; each round of
+## the former instance() copies of Z doubled the cone,
+## from 6 to 768 processes at round 8. Unfold stops at
+## the rounds covering the states of the check
+#####################################################
+
+def unfold_growth(rounds):
+    T = term
+    Z = T.Rec('Z', {'Z': T.EC(T.Seq(T.SP(a), T.Var('Z')), T.Seq(T.SP(b), T.Var('Z')))}, None)
+    for r in rounds:
+        with CheckContext() as ctx:
+            start = timeit.default_timer()
+            P = term.encode(term.at_round(Z, r))
+            build = timeit.default_timer() - start
+            cone = len(ctx.cone([P]))
+            start = timeit.default_timer()
+            DLF(P)
+            check = timeit.default_timer() - start
+            print("%8d %10d %10d %10.3f %10.3f" % (r, len(ctx.processes), cone, build, check))
+    start = timeit.default_timer()
+    result = term.Unfold('DLF', Z)
+    print("Unfold %12s %10.3f" % (result.verdict, timeit.default_timer() - start))
+
+#####################################################
+## the checks of examples.py, timed without their output
+#####################################################
+
+def example_checks():
+    X = RecP('EC(Seq(SP(a),X), Seq(SP(b),Y))', 2)
+    Y = RecP('EC(Seq(SP(a),Y), Seq(SP(b),X))', 2)
+    X.setup(['X', 'Y'], [X, Y])
+    Y.setup(['X', 'Y'], [X, Y])
+    Z = RecP('EC(Seq(SP(a),Z), Seq(SP(b),Z))', 2)
+    Z.setup(['Z'], [Z])
+    return [("e1 SFRef", lambda: SFRef(EC(SP(a), SP(b)), IC(SP(a), SP(b)))),
+            ("e2 DLF", lambda: DLF(Par([a, b], Seq(SP(a), SP(b)), Seq(SP(b), SP(c))))),
+            ("e2 ListAllTracesAndRefs", lambda: ListAllTracesAndRefs(Par([b], Seq(SP(a), SP(b)), Seq(SP(b), SP(c))))),
+            ("e3 SFRef", lambda: SFRef(IC(SP(c), SP(b)), Hide(EC(Seq(SP(a), SP(c)), SP(b)), [a]))),
+            ("e4 TRef", lambda: TRef(Z.create(), X.create())),
+            ("e4 FDRef", lambda: FDRef(Z.create(), X.create()))]
+
+def check_times():
+    for name, check in example_checks():
+        with CheckContext():
+            start = timeit.default_timer()
+            with contextlib.redirect_stdout(io.StringIO()):
+                check()
+            print("%-24s %10.3f" % (name, timeit.default_timer() - start))
+
+
+#####################################################
+## the dining philosophers by the explicit-state
+## semantics, see lts.py, with the recursion without
+## a bound; the events are strings, e.g., 'pickup.0.1'
+## is philosopher 0 picking up fork 1
+#####################################################
+
+def pickup(i, j):
+    return 'pickup.%d.%d' % (i, j)
+
+def putdown(i, j):
+    return 'putdown.%d.%d' % (i, j)
+
+# a philosopher picks up its fork first, or the other one if not left_first
+def philosopher(n, i, left_first=True):
+    first, second = (i, (i + 1) % n) if left_first else ((i + 1) % n, i)
+    body = term.Seq(term.SP(pickup(i, first)), term.Seq(term.SP(pickup(i, second)),
+           term.Seq(term.SP(putdown(i, second)), term.Seq(term.SP(putdown(i, first)), term.Var('X')))))
+    return term.Rec('X', {'X': body}, None)
+
+def fork(n, i):
+    j = (i - 1) % n
+    return term.Rec('X', {'X': term.EC(term.Seq(term.SP(pickup(i, i)), term.Seq(term.SP(putdown(i, i)), term.Var('X'))),
+                                       term.Seq(term.SP(pickup(j, i)), term.Seq(term.SP(putdown(j, i)), term.Var('X'))))}, None)
+
+# the pairs of a philosopher and its fork in a row, as PAR of the example;
+# the last philosopher picks up the other fork first if fixed
+def college(n, fixed):
+    P = term.Par([pickup(0, 0), putdown(0, 0)], philosopher(n, 0), fork(n, 0))
+    for i in range(1, n):
+        pair = term.Par([pickup(i, i), putdown(i, i)], philosopher(n, i, not (fixed and i == n - 1)), fork(n, i))
+        interface = [pickup(i - 1, i), putdown(i - 1, i)]
+        if i == n - 1:
+            interface += [pickup(i, 0), putdown(i, 0)]
+        P = term.Par(interface, P, pair)
+    return P
+
+def philosophers(sizes):
+    for n in sizes:
+        alphabet = [f(i, j) for f in (pickup, putdown) for i in range(n) for j in (i, (i + 1) % n)]
+        for fixed in [False, True]:
+            start = timeit.default_timer()
+            result = lts.DLF(college(n, fixed), alphabet)
+            print("%8d %-6s %14s %10.3f" % (n, fixed, result.verdict, timeit.default_timer() - start))
+
+# the deadlock free college by the explicit search and by the Horn clauses of chc.py
+def philosophers_horn(sizes):
+    for n in sizes:
+        alphabet = [f(i, j) for f in (pickup, putdown) for i in range(n) for j in (i, (i + 1) % n)]
+        start = timeit.default_timer()
+        explicit = lts.DLF(college(n, True), alphabet)
+        middle = timeit.default_timer()
+        horn = chc.DLF(college(n, True), alphabet)
+        print("%8d %14s %14s %10.3f %10.3f" % (n, explicit.verdict, horn.verdict, middle - start, timeit.default_timer() - middle))
+
+# the verdicts and counterexamples of the Horn clauses against the explicit search
+def horn_cases():
+    T = term
+    X = T.Rec('X', {'X': T.EC(T.Seq(T.SP(a), T.Var('X')), T.Seq(T.SP(b), T.Stop))}, None)
+    Y = T.Rec('Y', {'Y': T.Seq(T.SP(a), T.Var('Y'))}, None)
+    P = T.Par([b], T.Seq(T.SP(a), T.SP(b)), T.Seq(T.SP(b), T.SP(c)))
+    return [("a->Chaos", 'DVF', [T.Seq(T.SP(a), T.Chaos)]),
+            ("rec par", 'DLF', [T.Par([a], X, Y)]),
+            ("c", 'TRef', [T.SP(c), T.IC(T.SP(a), T.SP(b))]),
+            ("e1", 'SFRef', [T.EC(T.SP(a), T.SP(b)), T.IC(T.SP(a), T.SP(b))]),
+            ("a->Chaos", 'FDRef', [T.Seq(T.SP(a), T.Chaos), T.Seq(T.SP(a), T.SP(b))]),
+            ("hide par", 'TRef', [T.Hide(P, [b]), T.Seq(T.SP(a), T.SP(b))]),
+            ("hide par", 'SFRef', [T.Hide(P, [b]), T.Seq(T.SP(a), T.SP(c))])]
+
+def horn_checks():
+    for name, check, terms in horn_cases():
+        explicit, horn = chc.compare(check, *terms)
+        print("%-8s %-6s %-26s %s" % (name, check, "%s %s" % explicit, "%s %s" % horn))
+
+# the process doing any events of the alphabet
+def run(alphabet):
+    body = term.Seq(term.SP(alphabet[0]), term.Var('X'))
+    for e in alphabet[1:]:
+        body = term.EC(term.Seq(term.SP(e), term.Var('X')), body)
+    return term.Rec('X', {'X': body}, None)
+
+# trace refinement against the normal form of RUN and of a nondeterministic specification
+def philosopher_traces(sizes):
+    for n in sizes:
+        alphabet = [f(i, j) for f in (pickup, putdown) for i in range(n) for j in (i, (i + 1) % n)]
+        for name, Q in [("RUN", run(alphabet)), ("RUN |~| PAR", term.IC(run(alphabet), college(n, False)))]:
+            start = timeit.default_timer()
+            result = lts.TRef(college(n, True), Q, alphabet)
+            print("%8d %-12s %12s %10.3f" % (n, name, result.verdict, timeit.default_timer() - start))
+
+# the encodings of traces on the philosophers of one meal each, by the Z3 semantics of a model
+# over their own alphabet, see model.py; a fork serves both of its philosophers, one after the
+# other. The bounded encoding covers the traces of trace_bound events only. The seq encoding
+# only runs on the z3 releases it supports, see init.py; on z3 4.12.6 it took 12s and 80s for
+# two philosophers, 97s for the deadlock of three and over 5 minutes for the fixed three
+def meals(m, n, fixed):
+    def serve(i, j):
+        return m.Seq(m.SP(m.pickup(i, j)), m.SP(m.putdown(i, j)))
+    def philosopher(i):
+        first, second = (i, (i + 1) % n) if i < n - 1 or not fixed else ((i + 1) % n, i)
+        return m.Seq(m.SP(m.pickup(i, first)), m.Seq(serve(i, second), m.SP(m.putdown(i, first))))
+    def fork(i):
+        left, right = serve(i, i), serve((i - 1) % n, i)
+        return m.EC(m.Seq(left, right), m.Seq(right, serve(i, i)))
+    P = None
+    for i in range(n):
+        pair = m.Par([m.pickup(i, i), m.putdown(i, i)], philosopher(i), fork(i))
+        if P is None:
+            P = pair
+        else:
+            # the fork of the pair with the philosopher before it, and the last one with fork 0
+            forks = [(i - 1, i)] + ([(n - 1, 0)] if i == n - 1 else [])
+            P = m.Par([f(j, k) for f in (m.pickup, m.putdown) for j, k in forks], P, pair)
+    return P
+
+def philosophers_encodings(sizes):
+    # the module, as csp's init is the initial observation
+    import init
+    encodings = ['list', 'bounded'] + (['seq'] if init.seq_supported() else [])
+    for n in sizes:
+        for encoding in encodings:
+            saved, init.trace_encoding = init.trace_encoding, encoding
+            try:
+                m = model.Alphabet('meals_%d_%s' % (n, encoding), channels=[('pickup', [range(n), range(n)]),
+                                                                           ('putdown', [range(n), range(n)])])
+            finally:
+                init.trace_encoding = saved
+            for fixed in [False, True]:
+                with CheckContext():
+                    start = timeit.default_timer()
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        result = m.DLF(meals(m, n, fixed))
+                    print("%8d %-8s %-6s %14s %10.3f" % (n, encoding, fixed, result.verdict, timeit.default_timer() - start))
+
+# the proofs for all depths of lts.py: recursions with finite states, and one whose term grows
+# with each event, which is 'unknown' once the search explores the budget of states
+def proof_cases():
+    T = term
+    Z = T.Rec('Z', {'Z': T.EC(T.Seq(T.SP(a), T.Var('Z')), T.Seq(T.SP(b), T.Var('Z')))}, None)
+    X = T.Rec('X', {'X': T.EC(T.Seq(T.SP(a), T.Seq(T.Var('X'), T.SP(b))), T.SP(c))}, None)
+    return [("choice", 'DLF', [Z]),
+            ("choice", 'TRef', [Z, Z]),
+            ("grows", 'DLF', [X]),
+            ("grows", 'TRef', [X, Z])]
+
+def proofs(budget):
+    for name, check, terms in proof_cases():
+        start = timeit.default_timer()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = lts.Prove(check, *terms, budget=budget)
+        print("%-8s %-6s %14s %10.3f" % (name, check, result.verdict, timeit.default_timer() - start))
+
+
+#####################################################
+## decoding the refusals of a listing over an alphabet
+## of n events: the former simplify of each bit of a
+## set (before), the bitmask of its value (after) and
+## all sets at once by toMatrix, with NumPy if it is
+## installed
+#####################################################
+
+# the former toElements, a query of the simplifier for each element
+def elements_by_bits(Set, b):
+    s = []
+    be = BitVecVal(1, Set.size)
+    for i in range(Set.size):
+        t = simplify(b & (be << i))
+        if not (t == 0):
+            s.append(Set.alphabet[i])
+    return s
+
+def refusal_decoding(sizes, count=100):
+    for n in sizes:
+        Set = finite_set.FSetDecl([Int('e%d' % i) for i in range(n)])
+        rs = [BitVecVal(random.getrandbits(n), n) for i in range(count)]
+        times = []
+        for decode in [lambda: [elements_by_bits(Set, r) for r in rs],
+                       lambda: [Set.toElements(r) for r in rs],
+                       lambda: Set.toElementsMany(rs)]:
+            start = timeit.default_timer()
+            decode()
+            times.append(timeit.default_timer() - start)
+        print("%8d %10d %10.3f %10.3f %10.3f" % tuple([n, count] + times))
+
+
+#####################################################
+## trace refinement by one query against the enumeration
+## on the cases where the list encoding gave wrong
+## counterexamples; the single query needs the bounded
+## encoding and is rejected by the others
+#####################################################
+
+def single_query_cases():
+    return [("par", Par([b], Seq(SP(a), SP(b)), Seq(SP(b), SP(c))), Seq(SP(a), Seq(SP(b), SP(c)))),
+            ("hide", IC(SP(c), SP(b)), Hide(EC(Seq(SP(a), SP(c)), SP(b)), [a])),
+            ("hide3", SP(a), Hide(EC(Seq(SP(a), SP(c)), SP(b)), [a]))]
+
+def single_query_checks():
+    for name, P, Q in single_query_cases():
+        with CheckContext():
+            with contextlib.redirect_stdout(io.StringIO()):
+                expected = TRef(P, Q)
+                try:
+                    found = TRef(P, Q, single=True)
+                    single = "%s %s" % (found.verdict, found.trace)
+                    same = (found.verdict, found.trace) == (expected.verdict, expected.trace)
+                except ValueError:
+                    single, same = "rejected", "-"
+            print("%-8s %-26s %-26s %s" % (name, "%s %s" % (expected.verdict, expected.trace), single, same))
+
+
+if __name__ == '__main__':
+    print("trace encoding: " + trace_encoding)
+    print("check                       time(s)")
+    check_times()
+
+    print("case     enumeration                single query               same")
+    single_query_checks()
+
+    print("sequence  processes     axioms       cone   build(s)   check(s)")
+    print("before: eval(Q.expr)")
+    sequence_growth(rebuild, range(1, 11))
+    print("after: instance(Q)")
+    sequence_growth(instance, range(1, 11))
+
+    print("choices   processes     axioms       cone   build(s)   check(s)")
+    print("before: combinators")
+    repeated_growth(lambda n: choices(csp, n), [4, 8, 16, 24, 32])
+    print("after: encode(term)")
+    repeated_growth(lambda n: term.encode(choices(term, n)), [4, 8, 16, 24, 32])
+
+    print("rounds    processes       cone   build(s)   check(s)")
+    unfold_growth(range(1, 9))
+
+    print("philosophers fixed      verdict    time(s)")
+    philosophers(range(5, 11))
+
+    print("philosophers       explicit           horn explicit(s)    horn(s)")
+    philosophers_horn(range(5, 11))
+
+    print("case     check  explicit                   horn")
+    horn_checks()
+
+    print("philosophers spec         verdict    time(s)")
+    philosopher_traces(range(5, 10))
+
+    print("philosophers encoding fixed      verdict    time(s)")
+    philosophers_encodings([2, 3])
+
+    print("proof    check         verdict    time(s)")
+    proofs(10000)
+
+    print("alphabet   refusals  before(s)   after(s)  matrix(s)")
+    refusal_decoding([16, 64, 256, 1024])
@@ -0,0 +1,110 @@
+##########################################################
+## Persistent cache of the results of the checks
+## The results are stored in an SQLite file, keyed by a hash
+## of the check, the expr of its processes, the model and
+## the alphabet they are of, see model.py, the trace encoding
+## with its bound and the semantics: the source of the
+## modules defining it. A change of any of them misses the
+## cache, so nothing has to be invalidated by hand. The least
+## recently used results are evicted when the stored results
+## exceed max_size bytes.
+##
+## r = Cached('FDRef', P, Q)
+## r = Cached('DLF', P, path='ci.sqlite')
+##########################################################
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import timeit
+import init
+from results import *
+
+
+# the modules whose source is the semantics of the checks
+semantics_modules = ['init.py', 'csp.py', 'event.py', 'finite_set.py', 'model.py', 'term.py',
+                     'list.py', 'list_bounded.py', 'list_seq.py', 'list_unrolled.py']
+
+semantics = None
+
+def semantics_version():
+    global semantics
+    if semantics is None:
+        h = hashlib.sha256()
+        here = os.path.dirname(os.path.abspath(__file__))
+        for name in semantics_modules:
+            with open(os.path.join(here, name), 'rb') as f:
+                h.update(f.read())
+        semantics = h.hexdigest()
+    return semantics
+
+# the key of a check of some processes in the current configuration; the processes are of
+# the default csp module or of a model, whose alphabet and name tell them apart
+def cache_key(check, ps):
+    csp = ps[0].module
+    description = [semantics_version(), check, init.trace_encoding,
+                   init.trace_bound if init.trace_encoding in ('bounded', 'seq') else None,
+                   csp.model_name, [csp.EventToString(e) for e in csp.Set.alphabet],
+                   [P.expr for P in ps]]
+    return hashlib.sha256(json.dumps(description).encode()).hexdigest()
+
+
+class Cache:
+    def __init__(self, path='csp-cache.sqlite', max_size=64 * 1024 * 1024):
+        self.path = path
+        self.max_size = max_size
+        self.db = sqlite3.connect(path)
+        self.db.execute("CREATE TABLE IF NOT EXISTS results "
+                        "(key TEXT PRIMARY KEY, result TEXT, size INTEGER, used REAL)")
+
+    def get(self, key):
+        row = self.db.execute("SELECT result FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        with self.db:
+            self.db.execute("UPDATE results SET used = ? WHERE key = ?", (time.time(), key))
+        return Result.from_dict(json.loads(row[0]))
+
+    def put(self, key, result):
+        data = result.to_json()
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                            (key, data, len(data), time.time()))
+            self.evict()
+
+    # drop the least recently used results until the rest fit in max_size
+    def evict(self):
+        total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        for key, size in self.db.execute("SELECT key, size FROM results ORDER BY used").fetchall():
+            if total <= self.max_size:
+                break
+            self.db.execute("DELETE FROM results WHERE key = ?", (key,))
+            total -= size
+
+    def close(self):
+        self.db.close()
+
+# the caches opened so far, by their path
+caches = {}
+
+# run a check of csp.py, e.g., Cached('TRef', P, Q), or return its stored result; the result of
+# a hit has the time of the lookup and no solver calls
+def Cached(check, *ps, path='csp-cache.sqlite', max_size=64 * 1024 * 1024):
+    if path not in caches:
+        caches[path] = Cache(path, max_size)
+    cache = caches[path]
+    start = timeit.default_timer()
+    key = cache_key(check, ps)
+    result = cache.get(key)
+    if result is not None:
+        result.calls = 0
+        result.time = timeit.default_timer() - start
+        report("Cached: " + str(result.verdict))
+        return result
+    result = getattr(ps[0].module, check)(*ps)
+    # another run may find the verdict, e.g., with another configuration
+    if result.verdict != 'unknown':
+        cache.put(key, result)
+    return result
@@ -0,0 +1,312 @@
+##########################################################
+## Constrained Horn clauses for the fixed-point engine
+## A process is a network: a tree of Par over components,
+## the maximal sub-terms without Par at the top. Each
+## component is a finite automaton of its states by the
+## explicit semantics of lts.py, and the network is the
+## predicate reach over one location per component: a rule
+## for the start and one for each event and each set of
+## components doing it, as Par synchronises them. A check
+## is a query of a reachable violation, so the recursion
+## needs no bound and Spacer finds an invariant of the
+## network rather than exploring its product. For TRef,
+## SFRef and FDRef, the normal form of the specification
+## is one more component which follows every event. The
+## counterexample is rebuilt from the reach facts of the
+## derivation of a violation, and checked by replaying it
+## on the network; a derivation which cannot be replayed
+## gives no trace.
+## A component, or the normal form, of more states than
+## the budget, e.g., of a recursion which grows the term,
+## gives the verdict 'unknown'.
+##
+## P = Par([a], Rec('X', {'X': Seq(SP(a), Var('X'))}, None), ...)
+## DLF(P)
+## print(export('DLF', P))
+## compare('SFRef', P, Q)
+##########################################################
+
+from lts import *
+import lts
+
+
+class Network:
+    def __init__(self, P, alphabet=None, normal=None, budget=None):
+        self.lts = LTS(alphabet) if normal is None else normal.lts
+        self.budget = budget
+        self.width = len(self.lts.order)
+        # the states of each component
+        self.states = []
+        self.tree = self.component(P)
+        self.components = len(self.states)
+        # the nodes of the normal form of the specification, the last locations
+        self.normal = normal
+        if normal is not None:
+            self.states.append(self.nodes(normal))
+        n = len(self.states)
+        self.locations = [Int('pc_%d' % i) for i in range(n)]
+        self.after = [Int('pc_%d_next' % i) for i in range(n)]
+        self.kinds = [Int('kind_%d' % i) for i in range(self.components)]
+        self.refusals = [BitVec('refusal_%d' % i, self.width) for i in range(self.components)]
+        self.reach = Function('reach', *([IntSort()] * n + [BoolSort()]))
+
+    # the tree of Par of a term, with the number of each component at its leaves
+    def component(self, P):
+        if P.kind == 'Par':
+            return ('Par', self.lts.events(P.args[0]), self.component(P.args[1]), self.component(P.args[2]))
+        self.states.append(self.closure(P, lambda R: [R1 for e, R1 in self.lts.moves(R)]))
+        return ('Component', len(self.states) - 1)
+
+    def nodes(self, normal):
+        return self.closure(normal.start, lambda N: [self.follow(N, e) for e in self.lts.order])
+
+    # the node of the specification after an event; a pruned one, after a divergence of
+    # FDRef, stays where it is, as anything is allowed after it
+    def follow(self, N, e):
+        if self.normal.prune and self.normal.divergent[N]:
+            return N
+        return self.normal.step(N, e)
+
+    # the states reachable from a start one, which is the first; more than the budget of
+    # them raise Exhausted, as the search of lts.py does
+    def closure(self, start, successors):
+        states = [start]
+        seen = set(states)
+        for R in states:
+            for R1 in successors(R):
+                if R1 not in seen:
+                    if self.budget is not None and len(states) >= self.budget:
+                        raise Exhausted("more than %d states, the recursion may grow the term" % self.budget)
+                    seen.add(R1)
+                    states.append(R1)
+        return states
+
+    # the sets of components doing an event together, one for each way the network does it
+    def doing(self, node, e):
+        if node[0] == 'Component':
+            i = node[1]
+            if any([e in self.lts.initials(R)[1] for R in self.states[i]]):
+                return [frozenset([i])]
+            return []
+        (names, mask), left, right = node[1:]
+        if e in names:
+            return [l | r for l in self.doing(left, e) for r in self.doing(right, e)]
+        return self.doing(left, e) + self.doing(right, e)
+
+    # the states of a location after an event
+    def successors(self, i, n, e):
+        if i == self.components:
+            return [self.follow(self.states[i][n], e)]
+        return self.lts.after(self.states[i][n], e)
+
+    # a location moves by an event
+    def step(self, i, e):
+        index = dict([(R, n) for n, R in enumerate(self.states[i])])
+        return Or([And(self.locations[i] == n, self.after[i] == index[R1])
+                   for n in range(len(self.states[i])) for R1 in self.successors(i, n, e)])
+
+    # the bodies of the rules of an event, the observer follows every event
+    def rules(self, e):
+        rules = []
+        for components in self.doing(self.tree, e):
+            moving = components | frozenset(range(self.components, len(self.states)))
+            body = [self.reach(*self.locations)]
+            body += [self.step(i, e) if i in moving else self.after[i] == self.locations[i]
+                     for i in range(len(self.states))]
+            rules.append(body)
+        return rules
+
+    # the kind (0 waiting, 1 done, 2 divergent) and the refusal of an observation of the
+    # network at its locations, as initials_Par combines them, with their constraints
+    def observation(self, node, constraints):
+        if node[0] == 'Component':
+            i = node[1]
+            options = []
+            for n, R in enumerate(self.states[i]):
+                for o in self.lts.initials(R)[0]:
+                    k = 1 if o == 'done' else 2 if divergent(o) else 0
+                    options.append(And(self.locations[i] == n, self.kinds[i] == k, self.refusals[i] == self.lts.refusal(o)))
+            constraints.append(Or(options))
+            return self.kinds[i], self.refusals[i]
+        (names, mask), left, right = node[1:]
+        k1, r1 = self.observation(left, constraints)
+        k2, r2 = self.observation(right, constraints)
+        kind = If(Or(k1 == 2, k2 == 2), 2, If(And(k1 == 1, k2 == 1), 1, 0))
+        return kind, ((r1 | r2) & mask) | (r1 & r2 & ~BitVecVal(mask, self.width))
+
+    # the events between the locations of a path, or None if a step is not one of the network
+    def trace(self, path):
+        events = []
+        for before, after in zip(path, path[1:]):
+            for e in self.lts.order:
+                if any([all([self.states[i][after[i]] in self.successors(i, before[i], e)
+                             if i in components or i >= self.components
+                             else after[i] == before[i] for i in range(len(self.states))])
+                        for components in self.doing(self.tree, e)]):
+                    events.append(e)
+                    break
+            else:
+                return None
+        return events
+
+
+# the refusal r of a stable observation is not one of a node of the specification, as
+# Normal.missing finds them
+def missing(normal, N, r, alphabet):
+    a = ~r & alphabet
+    if not normal.closed:
+        return And([a != b for b in normal.acceptances[N]])
+    return And([BitVecVal(b, a.size()) & ~a != 0 for b in normal.acceptances[N]])
+
+# the fixed-point problem of a check: the rules of the network and the query of a violation;
+# the network keeps the violation at its locations and the refusal of the observation there
+def problem(check, P, Q=None, alphabet=None, closed=False, budget=None):
+    normal = None
+    if Q is not None:
+        normal = normal_form(Q, alphabet, check == 'FDRef', None if check == 'TRef' else closed)
+    network = Network(P, alphabet, normal, budget)
+    f = Fixedpoint()
+    f.set(engine='spacer')
+    # the derivation of a violation, as a proof whose facts are the locations it goes through
+    f.set('generate_proof_trace', True)
+    f.register_relation(network.reach)
+    f.declare_var(*(network.locations + network.after + network.kinds + network.refusals))
+    f.rule(network.reach(*[0] * len(network.states)))
+    for e in network.lts.order:
+        for body in network.rules(e):
+            f.rule(network.reach(*network.after), body)
+
+    constraints = []
+    kind, r = network.observation(network.tree, constraints)
+    alphabet = BitVecVal(network.lts.alphabet, network.width)
+    node = network.locations[-1]
+    if check == 'DLF':
+        violation = And(kind != 1, r == alphabet)
+    elif check == 'DVF':
+        violation = kind == 2
+    elif check == 'TRef':
+        # a stable observation of P after a trace whose node of Q is not stable
+        nodes = network.states[-1]
+        violation = And(kind != 2, Or([node == n for n, N in enumerate(nodes) if not normal.stable[N]]))
+    elif check == 'SFRef':
+        nodes = network.states[-1]
+        violation = And(kind != 2, Or([And(node == n, missing(normal, N, r, alphabet)) for n, N in enumerate(nodes)]))
+    elif check == 'FDRef':
+        # a divergence or a missing refusal of P after a trace where Q does not diverge
+        nodes = network.states[-1]
+        violation = Or([And(node == n, Or(kind == 2, missing(normal, N, r, alphabet)))
+                        for n, N in enumerate(nodes) if not normal.divergent[N]])
+    else:
+        raise ValueError("no Horn clauses for the check " + str(check))
+    network.violation = And(constraints + [violation])
+    network.kind, network.refusal = kind, r
+    return f, network, And(network.reach(*network.locations), network.violation)
+
+
+############################################
+# the checks
+############################################
+
+# the locations of the reach facts of a derivation from the start: a step of the proof is a
+# hyper-resolution whose conclusion is the last argument, after its premises
+def derivation(proof, network):
+    path = [[0] * len(network.states)]
+    todo = [(proof, False)]
+    while todo:
+        p, visited = todo.pop()
+        if not (is_app(p) and p.decl().kind() == Z3_OP_PR_HYPER_RESOLVE):
+            continue
+        fact = p.arg(p.num_args() - 1)
+        if visited:
+            if is_app(fact) and fact.decl().eq(network.reach) and all([is_int_value(l) for l in fact.children()]):
+                locations = [l.as_long() for l in fact.children()]
+                if locations != path[-1]:
+                    path.append(locations)
+        else:
+            todo.append((p, True))
+            todo.extend([(c, False) for c in reversed(p.children()[:-1])])
+    return path
+
+# the shortest path to a violation by unrolling the rules one event at a time, for the
+# answers whose proof leaves out the facts, e.g., the ones the preprocessing of the rules
+# folds into the query; there is one, as the query is sat
+def unroll(network):
+    s = Solver()
+    steps = [[IntVal(0)] * len(network.states)]
+    while True:
+        here = steps[-1]
+        s.push()
+        s.add(substitute(network.violation, *zip(network.locations, here)))
+        if s.check() == sat:
+            m = s.model()
+            return [[m.eval(l).as_long() for l in step] for step in steps]
+        s.pop()
+        after = [Int('pc_%d_%d' % (i, len(steps))) for i in range(len(network.states))]
+        pairs = list(zip(network.locations, here)) + list(zip(network.after, after))
+        s.add(Or([substitute(And(body[1:]), *pairs) for e in network.lts.order for body in network.rules(e)]))
+        steps.append(after)
+
+# the trace and the model of the observation at the end of a path, if the path is one of the
+# network and ends with a violation, otherwise None
+def replay(network, path):
+    trace = network.trace(path)
+    if trace is None:
+        return None
+    s = Solver()
+    s.add(network.violation)
+    s.add(And([l == n for l, n in zip(network.locations, path[-1])]))
+    if s.check() != sat:
+        return None
+    return trace, s.model()
+
+# the fixed-point problem of a check in SMT-LIB, e.g., for another Horn solver
+def export(check, *ps, alphabet=None, closed=False, budget=None):
+    f, network, query = problem(check, *ps, alphabet=alphabet, closed=closed, budget=budget)
+    return f.to_string([query])
+
+# the invariant of the network if there is no violation, otherwise the trace of the derivation;
+# 'unknown' if a component or the normal form of the specification has more than budget states
+def solve(check, ps, alphabet, closed, budget, verdicts, messages):
+    result = Result(check, None)
+    try:
+        f, network, query = problem(check, *ps, alphabet=alphabet, closed=closed, budget=budget)
+    except Exhausted as e:
+        return result.done('unknown', "No network: " + str(e))
+    answer = f.query(query)
+    if answer == unsat:
+        report(f.get_answer())
+        return result.done(verdicts[0], messages[0])
+    if answer == unknown:
+        return result.done('unknown', f.reason_unknown())
+    found = replay(network, derivation(f.get_answer(), network))
+    if found is None:
+        found = replay(network, unroll(network))
+    if found is None:
+        report("No trace: the derivation of the violation is not one of the network")
+    else:
+        result.trace, m = found
+        if check in ('SFRef', 'FDRef') and m.eval(network.kind).as_long() != 2:
+            result.refusal = network.lts.show(m.eval(network.refusal).as_long())
+        report(result.trace, result.refusal)
+    return result.done(verdicts[1], messages[1])
+
+def DLF(P, alphabet=None, budget=100000):
+    return solve('DLF', [P], alphabet, False, budget, ['deadlock free', 'deadlock'], ["Deadlock Free!!!", "Deadlock!!!"])
+
+def DVF(P, alphabet=None, budget=100000):
+    return solve('DVF', [P], alphabet, False, budget, ['divergence free', 'divergent'], ["Divergent Free!!!", "Divergent!!!"])
+
+def TRef(P, Q, alphabet=None, budget=100000):
+    return solve('TRef', [P, Q], alphabet, False, budget, ['refined', 'not refined'], ["Refined!!!", "No refinement"])
+
+def SFRef(P, Q, alphabet=None, closed=False, budget=100000):
+    return solve('SFRef', [P, Q], alphabet, closed, budget, ['refined', 'not refined'], ["Refined!!!", "No refinement"])
+
+def FDRef(P, Q, alphabet=None, closed=False, budget=100000):
+    return solve('FDRef', [P, Q], alphabet, closed, budget, ['refined', 'not refined'], ["Refined!!!", "No refinement"])
+
+# the verdicts and traces of a check by the explicit search of lts.py and by the Horn clauses
+def compare(check, *terms, **options):
+    explicit = getattr(lts, check)(*terms, **options)
+    horn = globals()[check](*terms, **options)
+    return (explicit.verdict, explicit.trace), (horn.verdict, horn.trace)
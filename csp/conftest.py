@@ -0,0 +1,27 @@
+##########################################################
+## The tests run the Z3 semantics with the bounded encoding
+## of traces, on which its checks are decided, see init.py;
+## a test of another encoding runs in an interpreter of its
+## own, see run_checks().
+##
+## cd csp && python -m pytest -q
+##########################################################
+
+import json
+import os
+import subprocess
+import sys
+import init
+
+init.trace_encoding = 'bounded'
+init.trace_bound = 6
+
+
+# the JSON printed by a script run in a new interpreter with an encoding of traces, e.g.,
+# to check the results do not depend on the order of the hashes of a run
+def run_checks(script, encoding, seed=0):
+    env = dict(os.environ, PYTHONHASHSEED=str(seed))
+    prelude = "import init\ninit.trace_encoding = %r\n" % encoding
+    out = subprocess.run([sys.executable, '-c', prelude + script], cwd=os.path.dirname(__file__),
+                         env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
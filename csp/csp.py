@@ -1,711 +1,916 @@
-##########################################
-#  UTP CSP Theory in Z3py with new recursion feature
-#  Kun Wei 29/05/2018
-# version 1.0
-##########################################
-
-########################################################################################
-## model-checking friendly semantics
-## R(¬P(f,f) |- P(t,f)) = (R3' R1(P(f,f) or (ok' and P(t,f)))) <| ok |> tr<=tr'
-#########################################################################################
-## obviously, tr<=tr' is infinite, and hard to be modelled for finite refinement
-## when the predecessor diverges, we simply use relational identity
-########################################################################################
-
-
-
-##########################################
-# Assumptions for model checking
-# 1. ref' is maximal, e.g., (a not in ref') means ref' is an arbitrary set who does not include a
-# 2. ref' is arbitrary when a process terminates, so we use Fullset only to denote it
-# 3. tr'<=tr when divergent, but we record tr'=tr only
-
-##########################################
-# the new semantic for CSP, not reactive design because it considers wait first
-# reactive design: R(not Pff |- Ptf)
-# new semantics:  R(Pff or (ok' and Ptf)) <| ok |> tr<=tr'
-# in order to simplify model checking, we consider the value of ok first rather than wait in reactive designs.
-
-
-from list import *
-from finite_set import *
-
-
-# Observational Variables
-Variables = Datatype('Variables')
-Variables.declare('Tuple', ('ok', BoolSort()), ('wait', BoolSort()), ('tr', List), ('ref', SetSort))
-Variables = Variables.create()
-
-Tuple = Variables.Tuple
-ok = Variables.ok
-wait = Variables.wait
-tr = Variables.tr
-ref = Variables.ref
-
-iv = Const('iv', Variables)	 # initial variables
-fv = Const('fv', Variables)	 # final variables
-mv = Const('mv', Variables)	 # temporal variables for composition
-
-
-# each process is an object of the process class
-# we have two classess for sequential processes and synchronised processes
-# definition for sequential processes
-class Process:
-    def __init__(self, predicate, expr):
-        # each process has a default id which starts from 0
-        global global_process_index
-        self.id = global_process_index
-        global_process_index += 1
-
-        self.expr = expr
-
-        self.iv = Const('iv_%s' % self.id, Variables)
-        self.fv = Const('fv_%s' % self.id, Variables)
-
-        #the predicate to match the pair of initial and final
-        predicate = substitute(predicate, (iv, self.iv), (fv, self.fv))
-
-        # a relation of initial and intermediate or final
-        self.relation= Function('re_%s'%self.id, Variables, Variables, BoolSort())
-
-        # add the constraint into the engine to implement the matching
-        default_solver.add(If(predicate, self.relation(self.iv,self.fv), self.relation(self.iv,self.fv)==False))
-
-
-# process for parallel because of the alphabetised interface
-class PProcess:
-    def __init__(self, cs, predicate, expr):
-        # each process has a default id which starts from 0
-        global global_process_index
-        self.id = global_process_index
-        global_process_index += 1
-
-        self.expr = expr
-
-        self.iv = Const('iv_%s'%self.id, Variables)
-        self.fv = Const('fv_%s'%self.id, Variables)
-        self.pt1 = Const('pt1_%s'%self.id, List)
-        self.pt2 = Const('pt2_%s' % self.id, List)
-        self.pt3 = Const('pt3_%s' % self.id, List)
-
-        # the predicate to match the pair of initial and final
-        predicate = substitute(predicate, (iv, self.iv), (fv, self.fv),(l1, self.pt1), (l2, self.pt2), (l3, self.pt3) )
-
-        # interface
-        al = Set.alphabet # the list of all elements in the alphabet
-        for i in range(len(al)):
-            if (al[i] in cs):
-                default_solver.add(interface(self.id, al[i]))
-            else:
-                default_solver.add(Not(interface(self.id, al[i])))
-
-        # a relation of initial and intermediate or final
-        self.relation = Function('re_%s'%self.id, Variables, Variables, BoolSort())
-
-        # add the constraint into the engine to implement the matching
-        default_solver.add(If(predicate, self.relation(self.iv, self.fv), self.relation(self.iv, self.fv) == False))
-
-
-
-# conditional: P <| b |> Q
-def con(P, b, Q):
-    return Or(And(P, b), And(Q, Not(b)))
-
-# relational identity: no change
-Identity = (iv == fv)
-
-# we record <> only if a process diverges immediately
-# and keep ref' is fullset for simplicity
-IDiv = And(tr(iv) == tr(fv), ref(fv)==Fullset)
-
-# reactive identity for ok' only
-# IR = ok' and wait'=wait and tr'=tr and ref'=ref
-IR = And(ok(fv), wait(fv) == wait(iv), tr(fv) == tr(iv), ref(fv) == ref(iv))
-
-# for any immediate divergence, we simply allow it to keep the existing observation.
-# in order to simplify model checking, we only keep the previous value for ref (no arbitrary set)
-# of course, we can further reduce the space by limiting the values for other variables
-
-############################################
-# selective healthiness conditions
-############################################
-# R1(P) = P and tr<=tr'
-def R1(P):
-    return And(P, prefix(tr(iv), tr(fv)))
-
-# R3(P) = IR <| wait |> P
-def R3(P):
-    return con(IR, wait(iv), P)
-
-def R(P):
-    return R3(P)
-    # actually all csp processes are r1-healthy in this simplified model
-    #return R3(R1(P))
-
-
-############################################
-# primitive processes
-############################################
-
-# Chaos = R(true), but we set ok' false to get a simple model
-# Chaos = R(True) <| ok |> tr<=tr')
-# FDR splits Chaos into two processes, IDiv and RUN. IDiv diverges immediately,
-# and RUN can execute any possible traces. We keep the idea of IDiv only but also
-# retain RUN by means of refinement. Anyway, the Z3 semantics of Chaos as
-# Chaos = R(IDiv) <| ok |> IDiv
-Chaos = Process(con(R(IDiv), ok(iv), IDiv), "Chaos")
-
-# Miracle = R(not ok)
-# Miracle = R(False) |> ok <| IDiv
-Miracle = Process(con(R(False), ok(iv), IDiv), "Miracle")
-
-
-# Stop = R(wait:=true)
-# Stop = R(true |- tr'=tr and wait')
-# Stop = R(ok' and tr'=tr and wait' and ref'=FullSet) <| ok |> IDiv
-Stop = Process(con(R(And(ok(fv), wait(fv), tr(fv) == tr(iv), ref(fv) == Fullset)), ok(iv), IDiv), "Stop")
-
-# Skip = R(true |- tr'=tr and not wait')
-# Skip = R(ok' and tr'=tr and not wait and ref'=FullSet <| ok |> IDiv)
-Skip = Process(con(R(And(ok(fv), Not(wait(fv)), tr(fv) == tr(iv), ref(fv) == Fullset)), ok(iv), IDiv), "Skip")
-
-
-
-###################################################################
-# Simple Prefix, e.g., a->Skip
-###################################################################
-# SP(a) = R(true |- tr'=tr and a noin ref' <| wait' | tr'=tr+<a>)
-# SP(a) = R(ok' and tr'=tr and a notin ref') <| wait' |> tr'=tr+<a>)
-
-# transfrom an event (abstract data) into a string
-# we use it for naming of a process
-def EventToString(e):
-    if e.num_args()==0:
-        return e.decl().name()
-    else:
-        #remove the first bracket
-        s = e.sexpr().replace("(", "", 1)
-        #add a bracket after CE
-        s = s.replace(" ", "(", 1)
-        #replace all whitespaces into semi-coma
-        s = s.replace(" ", ",")
-        return s
-
-def SP(a):
-    max_ref = Set.complement(Set.add(a,Set.emptyset()))
-    return Process(con(R(And(ok(fv), con(And(tr(fv)==tr(iv), ref(fv)==max_ref),
-                                             wait(fv),
-                                             And(diff(tr(fv),tr(iv),cons(a,nil)), ref(fv)==Fullset)))),
-                       ok(iv),
-                       IDiv), "SP("+EventToString(a)+")")
-
-
-####################################################################################
-# sequential composition
-####################################################################################
-# P;Q = R(¬(R1(Pff);R1(true)) and ¬(R1(Ptf);R1(¬wait and QFF))
-#                              |-
-#         R1(Ptf);R1(II <|wait' |> Qtf)
-####################################################################################
-# simplfied Z3 semantics
-# P;Q = R(Pff or Ptf;Qff or (ok' and (Ptf <| wait'|>Qtf))) <| ok |> IDiv
-
-def Seq(P, Q):
-    nsp = eval(Q.expr) # R is a new process
-    return Process(con(R(Or(And(P.relation(P.iv, P.fv), P.iv==iv, P.fv==fv, Not(ok(fv))),  # P diverges
-                            And(P.relation(P.iv, P.fv), nsp.relation(nsp.iv, nsp.fv), P.iv==iv, nsp.fv==fv,
-                                nsp.iv==P.fv, ok(P.fv), Not(wait(P.fv)), Not(ok(fv))),     # Q is divergent, P is not
-                            And(P.relation(P.iv, P.fv), P.iv==iv, P.fv==fv, ok(fv), wait(fv)),  # P is waiting
-                            And(P.relation(P.iv, P.fv), nsp.relation(nsp.iv, nsp.fv), P.iv==iv, nsp.fv==fv,
-                                nsp.iv==P.fv, ok(P.fv), Not(wait(P.fv)), ok(fv)))),
-                       ok(iv), IDiv), "Seq(" + P.expr + "," + Q.expr + ")")
-
-
-# external choince
-# P[]Q = R(¬Pff and ¬Qff |- (Ptf and Qtf) <| tr'=tr and wait' |> (Ptf or Qtf))
-# P[]Q = R(Pff or Qff or (ok' and (Ptf and Qtf <| tr'=tr and wait' |> Ptf or Qtf))) <| ok |> IDiv
-def EC(P,Q):
-    return Process(con(R(Or(And(P.relation(P.iv,P.fv), P.iv==iv, P.fv==fv, Not(ok(fv))), # Pff
-                            And(Q.relation(Q.iv,Q.fv), Q.iv==iv, Q.fv==fv, Not(ok(fv))), # Qff
-                            And(ok(fv), con(And(P.relation(P.iv,P.fv),Q.relation(Q.iv,Q.fv), P.iv==iv, Q.iv==iv, ok(P.fv),
-                                                wait(P.fv), tr(P.iv)==tr(P.fv), ok(Q.fv), wait(Q.fv), tr(Q.iv)==tr(Q.fv),
-                                                ref(fv)==Set.intersection (ref(P.fv),ref(Q.fv))),
-                                            And(tr(iv)==tr(fv), wait(fv)),
-                                            Or(And(P.relation(P.iv,P.fv), P.iv==iv, P.fv==fv),
-                                               And(Q.relation(Q.iv,Q.fv), Q.iv==iv, Q.fv==fv)))))),
-                       ok(iv),IDiv), "EC(" + P.expr + "," + Q.expr + ")")
-
-
-# internal choice
-# P |~| Q = R(¬Pff and ¬Qff |- Ptf or Qtf)
-# P|~|Q = R(Pff or Qff or (ok' and (Ptf or Qtf))) <| ok |> IDiv
-def IC(P, Q):
-    return Process(con(R(Or(And(P.relation(P.iv, P.fv), P.iv==iv, P.fv==fv, Not(ok(fv))),
-                            And(Q.relation(Q.iv, Q.fv), Q.iv==iv, Q.fv==fv, Not(ok(fv))),
-                            And(P.relation(P.iv, P.fv), P.iv==iv, P.fv==fv, ok(fv)),
-                            And(Q.relation(Q.iv, Q.fv), Q.iv==iv, Q.fv==fv, ok(fv)))),
-                       ok(iv), IDiv), "IC(" + P.expr + "," + Q.expr + ")")
-
-
-
-### Parallel Composition
-### P [| A |] Q = (ok'== P.ok' and Q.ok') and (wait'== P.wait' or Q.wait') and (tr'-tr==prod(A,P.tr'-P.tr,Q.tr'-Q.tr))
-###                ref' = union(inter(union(P.ref',Q.ref'),A), (inter(P.ref',Q.ref')\A)
-def Par(CS, P, Q):
-    r = Set.toSet(CS) # r is  the interface
-    return PProcess(CS, con(R(And(P.relation(P.iv, P.fv), Q.relation(Q.iv, Q.fv), P.iv==iv, Q.iv==iv,
-                                  ok(fv)==And(ok(P.fv), ok(Q.fv)), wait(fv)==Or(wait(P.fv), wait(Q.fv)),
-                                  diff(tr(P.fv), tr(iv), l1), diff(tr(Q.fv), tr(iv), l2), diff(tr(fv), tr(iv), l3),
-                                  parallel(global_process_index, l1, l2, l3),
-                                  ref(fv)==(Set.union(Set.intersection(Set.union(ref(P.fv), ref(Q.fv)), r),
-                                                      Set.difference(Set.intersection(ref(P.fv), ref(Q.fv)), r))))),
-                           ok(iv), IDiv), "Par(" + str(CS) + "," + P.expr + "," + Q.expr + ")")
-
-
-
-### Hiding
-def Hide(P, CS):
-    r = Set.toSet(CS)
-    return PProcess(CS, con(R(And(P.relation(P.iv, P.fv), P.iv==iv,
-									  diff(tr(P.fv), tr(P.iv), l1),
-                                      diff(tr(fv), tr(P.iv), l), event_filter(global_process_index,l1)==l,
-                                      ref(fv) == Set.union(ref(P.fv),r),
-                                      ref(P.fv) == Set.union(ref(fv),r),
-                                      ok(P.fv)==ok(fv), (wait(P.fv))==wait(fv))),
-						   ok(iv), IDiv), "Hide(" + P.expr + "," + str(CS) + ")")
-
-
-
-################################################################
-## Functions to enumerate all possible traces and refusal sets
-################################################################
-#initial state for a compound csp process; that is, ok is true, wait is false, tr is <> and ref is Fullset
-init = Tuple(True, False, nil, Fullset)
-
-
-# show one trace for termination
-def ListOneTerminatedTrace(P):
-    s = default_solver
-    s.push()
-    s.add(And(P.relation(P.iv, P.fv), P.iv == init, P.fv == fv, ok(fv), Not(wait(fv))))
-    if s.check()!=unsat:
-        print (s.model()[fv].children()[2])
-    else:
-        print ("No solution!")
-    s.pop()
-
-# show all terminated traces
-def ListAllTerminatedTraces(P):
-    s = default_solver
-    s.push()
-    s.add(And(P.relation(P.iv, P.fv), P.iv == init, P.fv == fv, ok(fv), Not(wait(fv))))
-
-    while s.check() != unsat:
-        m = s.model()
-        t = m[fv].children()[2]
-        print (t)
-        s.add(tr(fv) != t)
-    s.pop()
-    print ("Done")
-
-# show all traces which are deadlock or terminated
-def ListAllTraces(P):
-    s = default_solver
-    s.push()
-    s.add( And(P.relation(P.iv, P.fv), P.iv == init, P.fv==fv))
-    #stable
-    s.push()
-    s.add(ok(fv))
-    print ("Stable:")
-
-    while s.check() != unsat:
-        m = s.model()
-        #print (m)
-        t= (m[fv].children()[2])
-        print (t)
-        s.add( tr(fv) != t )
-
-    s.pop()
-    # divergent
-    s.add(Not(ok(fv)))
-
-    print("Divergent:")
-    while s.check() == sat:
-        m = s.model()
-        t = m[fv].children()[2]
-        print (t)
-        s.add(tr(fv) != t)
-    s.pop()
-    print("Done")
-
-# show all traces and their refusals including divergent traces
-def ListAllTracesAndRefs(P):
-    s = default_solver
-    s.push()
-
-    s.add(And(P.relation(P.iv, P.fv), P.iv == init, P.fv == fv))
-    # stable
-    s.push()
-    s.add(ok(fv))
-    print ("Stable:")
-    while s.check() != unsat:
-        m = s.model()
-        t = m[fv].children()[2]
-        r = m[fv].children()[3]
-        print (t, Set.toElements(r))
-
-        s.push()
-        s.add(And(tr(fv)==t, ref(fv)!=r))
-        while s.check() == sat:
-            m1 = s.model()
-            t1 = m1[fv].children()[2]
-            r1 = m1[fv].children()[3]
-            print (t1, Set.toElements(r1))
-            s.add(ref(fv)!=r1)
-        s.pop()
-
-        s.add(tr(fv)!=t)
-    s.pop()
-
-    # divergent
-    s.add(Not(ok(fv)))
-    print("Divergent:")
-    while s.check() == sat:
-        m = s.model()
-        t = m[fv].children()[2]
-        print (t)
-        s.add(tr(fv) != t)
-
-    s.pop()
-    print("Done")
-
-
-##########################################################
-#### Refinement ##########################################
-#### P refines Q iff P => Q ##############################
-#### TRef : check traces only
-#### SFRef: check traces and refusals
-#### DFRef: check failures and divergences
-##########################################################
-
-# check stable traces only; that is ok' is true and ignore any divergent trace.
-# Howe
-def TRef(P,Q):
-    s = default_solver
-    s.push() #1
-    s.add(And(P.relation(P.iv, P.fv), P.iv == init, P.fv == fv, ok(fv)))
-
-    while s.check() !=unsat:
-        m = s.model()
-        t = m[fv].children()[2]
-        print (t)
-
-        s.push() #2 for Q
-        s.add(And(Q.relation(Q.iv, Q.fv), Q.iv == init, ok(Q.fv), tr(Q.fv)==t))
-        if s.check()==sat:
-            s.pop() #2
-        else:
-            print ("No refinement")
-            s.pop() #2
-            s.pop() #1
-            return
-        s.add(tr(fv) != t)
-
-    s.pop() #1
-    print ("Refined!!!")
-
-# check stable traces and refusals
-def SFRef(P,Q):
-    s = default_solver
-    s.push() #1
-    s.add(And(P.relation(P.iv, P.fv), P.iv == init, P.fv == fv, ok(fv)))
-
-    while s.check() != unsat:
-        m = s.model()
-        t = m[fv].children()[2]
-        r = m[fv].children()[3]
-        print (t, Set.toElements(r))
-        #checking Q
-        s.push() #2
-        s.add(And(Q.relation(Q.iv, Q.fv), Q.iv == init, ok(Q.fv), tr(Q.fv) == t, ref(Q.fv)==r))
-
-        if s.check() != unsat:
-            s.pop() #2 remove the constraint for Q
-            # same trace but different refusals
-            s.push() #3 for P, same trace but different refs
-            s.add(And(tr(fv)==t, ref(fv)!=r))
-            while s.check() == sat:
-                m1 = s.model()
-                #t1 = m[fv].children()[2]
-                r1 = m1[fv].children()[3]
-                print (t, Set.toElements(r1))
-                #checning Q
-                s.push() #4 constraint for Q again
-                s.add(And(Q.relation(Q.iv, Q.fv), Q.iv == init, ok(Q.fv), tr(Q.fv) == t, ref(Q.fv) == r1))
-                if s.check() == sat:
-                    s.pop() #4
-                    s.add(ref(fv)!=r1) # add into 3
-                else:
-                    s.pop() #4
-                    s.pop() #3
-                    s.pop() #1
-                    print ("No refinement")
-                    return
-            s.pop() #3 remove all constraints about this trace(P)
-            s.add(tr(fv)!=t) # add into 1
-        else:
-            print ("No refinement")
-            s.pop() #2
-            s.pop() #1
-            return
-    s.pop() # remove 1
-    print ("Refined!!!")
-
-
-# refusla set
-
-#################################################################################
-# the procedure for Divergence-Failure is very complex because we record
-# the least observation for divergence rather than arbitrary Obs
-# So, we check non-divergent and divergent behaviours separately
-##################################################################################
-
-###############################################
-## auxiliary function for divergent checking
-###############################################
-
-def isDivergent(P):
-    s = default_solver
-    s.push()
-    s.add(And(P.relation(P.iv, P.fv), P.iv == init, P.fv == fv, Not(ok(fv))))
-    if s.check() != unsat:
-        s.pop()
-        return True
-    else:
-        s.pop()
-        return False
-
-# P is non-divergent and Q is divergent
-def NonDivergentRefineDivergent(P,Q):
-    s = default_solver
-    s.push()  # 1
-    s.add(And(P.relation(P.iv, P.fv), P.iv == init, P.fv == fv, ok(fv)))
-
-    while s.check() != unsat:
-        m = s.model()
-        t = m[fv].children()[2]
-        r = m[fv].children()[3]
-        print(t, Set.toElements(r))
-        # checking Q
-        s.push()  # 2
-        s.add(And(Q.relation(Q.iv, Q.fv), Q.iv == init, ok(Q.fv), tr(Q.fv) == t, ref(Q.fv) == r))
-        if s.check() == sat: # whether the trace is included in Q
-            s.pop()  # 2 remove the constraint for Q
-            # same trace but different refusals
-            s.push()  # 3 for P, same trace but different refs
-            s.add(And(tr(fv) == t, ref(fv) != r))
-            while s.check() == sat:
-                m1 = s.model()
-                # t1 = m[fv].children()[2]
-                r1 = m1[fv].children()[3]
-                print(t, Set.toElements(r1))
-                # checning Q
-                s.push()  # 4 constraint for Q again
-                s.add(And(Q.relation(Q.iv, Q.fv), Q.iv == init, ok(Q.fv), tr(Q.fv) == t, ref(Q.fv) == r1))
-                if s.check() == sat:
-                    s.pop()  # 4
-                    s.add(ref(fv) != r1)  # add into 3
-                else:
-                    s.pop()  # 4
-
-                    s.push()  # check divergent trace
-                    s.add(And(Q.relation(Q.iv, Q.fv), Q.iv == init, Not(ok(Q.fv)), prefix(tr(Q.fv), t)))
-                    if s.check() == unsat:
-                        s.pop() # pop up the constraint for divergence
-                        s.pop() #3
-                        s.pop() #1
-                        print ("No refinement")
-                        return
-                    else:
-                        s.pop() # pop up divergence
-                        s.add(ref(fv) != r1)  # add into 3
-
-            s.pop()  # 3 remove all constraints about this trace(P)
-            s.add(tr(fv) != t)  # add into 1
-        else:
-            s.pop()  # 2 remove the constraint for Q and add in new one for divergence
-            s.push() # check divergent trace
-            s.add(And(Q.relation(Q.iv, Q.fv), Q.iv == init, Not(ok(Q.fv)), prefix(tr(Q.fv),t)))
-            if s.check()==unsat:
-                s.pop()
-                print ("No refinement!!!")
-                s.pop()  # 1
-                return # exit the first while loop
-            s.pop()
-            s.add(And(tr(fv) != t))
-    s.pop()  # remove 1
-    print("Refined!!!")
-
-def DivergentRefineDivergent(P,Q):
-    s = default_solver
-    s.push()  # 1
-    s.add(And(P.relation(P.iv, P.fv), P.iv == init, P.fv == fv, ok(fv)))
-
-    while s.check() != unsat:
-        m = s.model()
-        t = m[fv].children()[2]
-        r = m[fv].children()[3]
-        print(t, Set.toElements(r))
-        # checking Q
-        s.push()  # 2
-        s.add(And(Q.relation(Q.iv, Q.fv), Q.iv == init, ok(Q.fv), tr(Q.fv) == t, ref(Q.fv) == r))
-        if s.check() == sat:  # whether the trace is included in Q
-            s.pop()  # 2 remove the constraint for Q
-            # same trace but different refusals
-            s.push()  # 3 for P, same trace but different refs
-            s.add(And(tr(fv) == t, ref(fv) != r))
-            while s.check() == sat:
-                m1 = s.model()
-                # t1 = m[fv].children()[2]
-                r1 = m1[fv].children()[3]
-                print(t, Set.toElements(r1))
-                # checning Q
-                s.push()  # 4 constraint for Q again
-                s.add(And(Q.relation(Q.iv, Q.fv), Q.iv == init, ok(Q.fv), tr(Q.fv) == t, ref(Q.fv) == r1))
-                if s.check() == sat:
-                    s.pop()  # 4
-                    s.add(ref(fv) != r1)  # add into 3
-                else:
-                    s.pop()  # 4
-
-                    s.push()  # check divergent trace
-                    s.add(And(Q.relation(Q.iv, Q.fv), Q.iv == init, Not(ok(Q.fv)), prefix(tr(Q.fv), t)))
-                    if s.check() == unsat:
-                        s.pop()  # pop up the constraint for divergence
-                        s.pop()  # 3
-                        s.pop()  # 1
-                        print("No refinement")
-                        return
-                    else:
-                        s.pop()  # pop up divergence
-                        s.add(ref(fv) != r1)  # add into 3
-
-            s.pop()  # 3 remove all constraints about this trace(P)
-            s.add(tr(fv) != t)  # add into 1
-        else:
-            s.pop()  # 2 remove the constraint for Q and add in new one for divergence
-            s.push()  # check divergent trace
-            s.add(And(Q.relation(Q.iv, Q.fv), Q.iv == init, Not(ok(Q.fv)), prefix(tr(Q.fv), t)))
-            if s.check() == unsat:
-                s.pop()
-                print("No refinement!!!")
-                s.pop()  # 1
-                return  # exit the first while loop
-            s.pop()
-
-            s.add(tr(fv) != t)
-
-    s.pop()  # remove 1
-
-
-    ###################
-    # check divergence
-    s.push() #0
-    s.push() #1
-    s.add(And(P.relation(P.iv, P.fv), P.iv == init, P.fv == fv, Not(ok(fv))))
-
-    while s.check() != unsat:
-        m = s.model()
-        t = m[fv].children()[2]
-        print(t, "Divergent")
-
-        s.pop() #1
-
-        s.push() #2
-        s.add(And(Q.relation(Q.iv, Q.fv), Q.iv == init, Not(ok(Q.fv)), prefix(tr(Q.fv),t)))
-        if s.check()!= unsat:
-            s.pop() #2
-            s.add(And(tr(fv) != t))
-            s.push() #1
-            s.add(And(P.relation(P.iv, P.fv), P.iv == init, P.fv == fv, Not(ok(fv))))
-        else:
-            s.pop() #2
-            s.pop() #0
-            print ("No Refinement!!!")
-            return
-    s.pop()
-    s.pop()
-    print ("refined!!!")
-
-# failure-divergence model
-def FDRef(P,Q):
-
-    DoP = isDivergent(P)
-    DoQ = isDivergent(Q)
-    # P and Q are non-divergent, so use SFRef for refinement
-    if DoP==False and DoQ==False:
-        SFRef(P,Q)
-    # If P is divergent and Q is not, then P cannot refine Q
-    elif DoP==True and DoQ==False: #
-        print ("No refinement")
-    elif DoP==False and DoQ==True:
-        NonDivergentRefineDivergent(P,Q)
-    else:
-        DivergentRefineDivergent(P,Q)
-
-########################################
-## deadlock free and divergence free
-########################################
-
-# deadlock free
-def DLF(P):
-    s = default_solver
-    s.push()
-    s.add(And(P.relation(P.iv, P.fv), P.iv == init, P.fv == fv, wait(fv), ref(fv)==Fullset))
-    if s.check() == sat:
-        print (s.model()[fv])
-        print ("Deadlock!!!")
-    else:
-        print ("Deadlock Free!!!")
-    s.pop()
-
-# divergence free
-def DVF(P):
-    s = default_solver
-    s.push()
-    s.add(And(P.relation(P.iv, P.fv), P.iv == init, P.fv == fv, Not(ok(fv))))
-    if s.check() == sat:
-        print (s.model()[fv])
-        print ("Divergent!!!")
-    else:
-        print ("Divergent Free!!!")
-    s.pop()
-
-#########################################################
-## Recursive Processes, which support mutal recursion
-#########################################################
-
-class RecP:
-    def __init__(self, body, round):
-        self.body = body
-        self.vl = []
-        self.pl = []
-        self.round = round
-
-    def setup(self, vl, pl):
-        self.vl = vl
-        self.pl = pl
-
-    def create(self):
-        expr = self.copy(self.round)
-        return eval(expr)
-
-    def copy(self, round):
-        if round == 0:
-            return 'Skip'
-        else:
-            body = self.body
-            for i in range(len(self.pl)):
-                body = body.replace(self.vl[i], self.pl[i].copy(round-1))
-            return body
-
+##########################################
+#  UTP CSP Theory in Z3py with new recursion feature
+#  Kun Wei 29/05/2018
+# version 1.0
+##########################################
+
+########################################################################################
+## model-checking friendly semantics
+## R(¬P(f,f) |- P(t,f)) = (R3' R1(P(f,f) or (ok' and P(t,f)))) <| ok |> tr<=tr'
+#########################################################################################
+## obviously, tr<=tr' is infinite, and hard to be modelled for finite refinement
+## when the predecessor diverges, we simply use relational identity
+########################################################################################
+
+
+
+##########################################
+# Assumptions for model checking
+# 1. ref' is maximal, e.g., (a not in ref') means ref' is an arbitrary set who does not include a
+# 2. ref' is arbitrary when a process terminates, so we use Fullset only to denote it
+# 3. tr'<=tr when divergent, but we record tr'=tr only
+
+##########################################
+# the new semantic for CSP, not reactive design because it considers wait first
+# reactive design: R(not Pff |- Ptf)
+# new semantics:  R(Pff or (ok' and Ptf)) <| ok |> tr<=tr'
+# in order to simplify model checking, we consider the value of ok first rather than wait in reactive designs.
+
+
+# finite_set first: its z3 names must not hide SetSort of event.py
+from finite_set import *
+from list import *
+from results import *
+import copy
+import sys
+
+# this copy of the semantics, the default one or the one of a model of model.py
+module = sys.modules[__name__]
+
+
+# Observational Variables
+Variables = Datatype('Variables')
+Variables.declare('Tuple', ('ok', BoolSort()), ('wait', BoolSort()), ('tr', List), ('ref', SetSort))
+Variables = Variables.create()
+
+Tuple = Variables.Tuple
+ok = Variables.ok
+wait = Variables.wait
+tr = Variables.tr
+ref = Variables.ref
+
+iv = Const('iv', Variables)	 # initial variables
+fv = Const('fv', Variables)	 # final variables
+mv = Const('mv', Variables)	 # temporal variables for composition
+
+
+# each process is an object of the process class
+# we have two classess for sequential processes and synchronised processes
+# definition for sequential processes
+class Process:
+    # whether the relation is defined once for all variables, see share()
+    shared = False
+
+    def __init__(self, predicate, expr):
+        # each process has a default id which starts from 0
+        self.id = new_process_index()
+
+        self.expr = expr
+
+        self.iv = Const('iv_%s' % self.id, Variables)
+        self.fv = Const('fv_%s' % self.id, Variables)
+
+        #the predicate to match the pair of initial and final
+        predicate = substitute(predicate, (iv, self.iv), (fv, self.fv))
+
+        # a relation of initial and intermediate or final
+        self.relation= Function('re_%s'%self.id, Variables, Variables, BoolSort())
+
+        # the constraint to implement the matching, asserted by the queries involving this process
+        self.ctx = current_context()
+        self.module = module
+        self.axioms = [If(predicate, self.relation(self.iv,self.fv), self.relation(self.iv,self.fv)==False)]
+
+        # the processes and list functions used by the predicate, i.e., the dependency DAG
+        self.calls = applied_names(predicate)
+        self.deps = dependencies(self)
+        self.ctx.register(self)
+
+
+# the processes whose variables are used by the predicate of P
+def dependencies(P):
+    return [P.ctx.lookup(int(n[3:])) for n in P.calls if n.startswith('iv_') and n != 'iv_%s' % P.id]
+
+
+# process for parallel because of the alphabetised interface
+class PProcess:
+    shared = False
+
+    def __init__(self, cs, predicate, expr):
+        # each process has a default id which starts from 0
+        self.id = new_process_index()
+
+        self.expr = expr
+
+        self.iv = Const('iv_%s'%self.id, Variables)
+        self.fv = Const('fv_%s'%self.id, Variables)
+        self.pt1 = Const('pt1_%s'%self.id, List)
+        self.pt2 = Const('pt2_%s' % self.id, List)
+        self.pt3 = Const('pt3_%s' % self.id, List)
+        # the trace of the hidden events of Hide, of its own for each process
+        self.pt = Const('pt_%s' % self.id, List)
+
+        # the predicate to match the pair of initial and final
+        predicate = substitute(predicate, (iv, self.iv), (fv, self.fv),(l1, self.pt1), (l2, self.pt2), (l3, self.pt3), (l, self.pt))
+
+        self.ctx = current_context()
+        self.module = module
+        self.axioms = []
+
+        # interface
+        al = Set.alphabet # the list of all elements in the alphabet
+        for i in range(len(al)):
+            if (al[i] in cs):
+                self.axioms.append(interface(self.id, al[i]))
+            else:
+                self.axioms.append(Not(interface(self.id, al[i])))
+
+        # a relation of initial and intermediate or final
+        self.relation = Function('re_%s'%self.id, Variables, Variables, BoolSort())
+
+        # the constraint to implement the matching, asserted by the queries involving this process
+        self.axioms.append(If(predicate, self.relation(self.iv, self.fv), self.relation(self.iv, self.fv) == False))
+
+        # the processes and list functions used by the predicate, i.e., the dependency DAG
+        self.calls = applied_names(predicate)
+        self.deps = dependencies(self)
+        self.ctx.register(self)
+
+
+# a fresh instance of a process, e.g., for Q in P;Q which starts from the final state of P.
+# each relation is only applied to the variables of its own process, so an instance is the
+# same parameterised relation with new variables: the axioms of the cone are renamed rather
+# than the whole sub-tree being rebuilt, so its size is linear in the size of the cone
+def instance(P, copies=None):
+    if copies is None:
+        copies = {}
+    if P.id in copies:
+        return copies[P.id]
+
+    N = copy.copy(P)
+    N.id = new_process_index()
+    copies[P.id] = N
+
+    N.iv = Const('iv_%s' % N.id, Variables)
+    N.fv = Const('fv_%s' % N.id, Variables)
+    N.ctx = current_context()
+    N.ctx.register(N)
+    if P.shared:
+        # the relation and its definition are kept, only the variables are new
+        return N
+
+    N.relation = Function('re_%s' % N.id, Variables, Variables, BoolSort())
+    pairs = [(P.relation(P.iv, P.fv), N.relation(N.iv, N.fv)), (P.iv, N.iv), (P.fv, N.fv)]
+    if isinstance(P, PProcess):
+        N.pt1 = Const('pt1_%s' % N.id, List)
+        N.pt2 = Const('pt2_%s' % N.id, List)
+        N.pt3 = Const('pt3_%s' % N.id, List)
+        N.pt = Const('pt_%s' % N.id, List)
+        pairs += [(P.pt1, N.pt1), (P.pt2, N.pt2), (P.pt3, N.pt3), (P.pt, N.pt)]
+
+    N.deps = [instance(D, copies) for D in P.deps]
+    for D, ND in zip(P.deps, N.deps):
+        pairs += [(D.relation(D.iv, D.fv), ND.relation(ND.iv, ND.fv)), (D.iv, ND.iv), (D.fv, ND.fv)]
+    N.axioms = [substitute(A, *pairs) for A in P.axioms]
+    N.calls = set([n for n in P.calls if not n.startswith('re_')] + [ND.relation.name() for ND in N.deps])
+    return N
+
+
+# define the relation of a process without sub-processes, e.g., Skip or SP(a), for all
+# initial and final variables. All instances of the process then share the relation and
+# its definition rather than each of them asserting a renamed copy of the axiom
+def share(P):
+    assert P.deps == []
+    predicate = P.axioms[-1].arg(0)
+    define(ForAll([P.iv, P.fv], P.relation(P.iv, P.fv) == predicate, patterns=[P.relation(P.iv, P.fv)]))
+    P.axioms = P.axioms[:-1]
+    P.calls = set([P.relation.name()])
+    P.shared = True
+    return P
+
+
+# conditional: P <| b |> Q
+def con(P, b, Q):
+    return Or(And(P, b), And(Q, Not(b)))
+
+# relational identity: no change
+Identity = (iv == fv)
+
+# we record <> only if a process diverges immediately
+# and keep ref' is fullset for simplicity
+IDiv = And(tr(iv) == tr(fv), ref(fv)==Fullset)
+
+# reactive identity for ok' only
+# IR = ok' and wait'=wait and tr'=tr and ref'=ref
+IR = And(ok(fv), wait(fv) == wait(iv), tr(fv) == tr(iv), ref(fv) == ref(iv))
+
+# for any immediate divergence, we simply allow it to keep the existing observation.
+# in order to simplify model checking, we only keep the previous value for ref (no arbitrary set)
+# of course, we can further reduce the space by limiting the values for other variables
+
+############################################
+# selective healthiness conditions
+############################################
+# R1(P) = P and tr<=tr'
+def R1(P):
+    return And(P, prefix(tr(iv), tr(fv)))
+
+# R3(P) = IR <| wait |> P
+def R3(P):
+    return con(IR, wait(iv), P)
+
+def R(P):
+    return R3(P)
+    # actually all csp processes are r1-healthy in this simplified model
+    #return R3(R1(P))
+
+
+############################################
+# primitive processes
+############################################
+
+# Chaos = R(true), but we set ok' false to get a simple model
+# Chaos = R(True) <| ok |> tr<=tr')
+# FDR splits Chaos into two processes, IDiv and RUN. IDiv diverges immediately,
+# and RUN can execute any possible traces. We keep the idea of IDiv only but also
+# retain RUN by means of refinement. Anyway, the Z3 semantics of Chaos as
+# Chaos = R(IDiv) <| ok |> IDiv
+Chaos = Process(con(R(IDiv), ok(iv), IDiv), "Chaos")
+
+# Miracle = R(not ok)
+# Miracle = R(False) |> ok <| IDiv
+Miracle = Process(con(R(False), ok(iv), IDiv), "Miracle")
+
+
+# Stop = R(wait:=true)
+# Stop = R(true |- tr'=tr and wait')
+# Stop = R(ok' and tr'=tr and wait' and ref'=FullSet) <| ok |> IDiv
+Stop = Process(con(R(And(ok(fv), wait(fv), tr(fv) == tr(iv), ref(fv) == Fullset)), ok(iv), IDiv), "Stop")
+
+# Skip = R(true |- tr'=tr and not wait')
+# Skip = R(ok' and tr'=tr and not wait and ref'=FullSet <| ok |> IDiv)
+Skip = Process(con(R(And(ok(fv), Not(wait(fv)), tr(fv) == tr(iv), ref(fv) == Fullset)), ok(iv), IDiv), "Skip")
+
+
+
+###################################################################
+# Simple Prefix, e.g., a->Skip
+###################################################################
+# SP(a) = R(true |- tr'=tr and a noin ref' <| wait' | tr'=tr+<a>)
+# SP(a) = R(ok' and tr'=tr and a notin ref') <| wait' |> tr'=tr+<a>)
+
+# transfrom an event (abstract data) into a string
+# we use it for naming of a process
+def EventToString(e):
+    if e.num_args()==0:
+        return e.decl().name()
+    else:
+        #remove the first bracket
+        s = e.sexpr().replace("(", "", 1)
+        #add a bracket after CE
+        s = s.replace(" ", "(", 1)
+        #replace all whitespaces into semi-coma
+        s = s.replace(" ", ",")
+        return s
+
+def SP(a):
+    max_ref = Set.complement(Set.add(a,Set.emptyset()))
+    return Process(con(R(And(ok(fv), con(And(tr(fv)==tr(iv), ref(fv)==max_ref),
+                                             wait(fv),
+                                             And(diff(tr(fv),tr(iv),cons(a,nil)), ref(fv)==Fullset)))),
+                       ok(iv),
+                       IDiv), "SP("+EventToString(a)+")")
+
+
+####################################################################################
+# sequential composition
+####################################################################################
+# P;Q = R(¬(R1(Pff);R1(true)) and ¬(R1(Ptf);R1(¬wait and QFF))
+#                              |-
+#         R1(Ptf);R1(II <|wait' |> Qtf)
+####################################################################################
+# simplfied Z3 semantics
+# P;Q = R(Pff or Ptf;Qff or (ok' and (Ptf <| wait'|>Qtf))) <| ok |> IDiv
+
+# fresh: Q starts from a fresh instance, as it may be a process used elsewhere too; the
+# encoding of terms gives a Q of this sequence only, see term.py
+def Seq(P, Q, fresh=True):
+    nsp = instance(Q) if fresh else Q # nsp is a fresh instance of Q
+    return Process(con(R(Or(And(P.relation(P.iv, P.fv), P.iv==iv, P.fv==fv, Not(ok(fv))),  # P diverges
+                            And(P.relation(P.iv, P.fv), nsp.relation(nsp.iv, nsp.fv), P.iv==iv, nsp.fv==fv,
+                                nsp.iv==P.fv, ok(P.fv), Not(wait(P.fv)), Not(ok(fv))),     # Q is divergent, P is not
+                            And(P.relation(P.iv, P.fv), P.iv==iv, P.fv==fv, ok(fv), wait(fv)),  # P is waiting
+                            And(P.relation(P.iv, P.fv), nsp.relation(nsp.iv, nsp.fv), P.iv==iv, nsp.fv==fv,
+                                nsp.iv==P.fv, ok(P.fv), Not(wait(P.fv)), ok(fv)))),
+                       ok(iv), IDiv), "Seq(" + P.expr + "," + Q.expr + ")")
+
+
+# external choince
+# P[]Q = R(¬Pff and ¬Qff |- (Ptf and Qtf) <| tr'=tr and wait' |> (Ptf or Qtf))
+# P[]Q = R(Pff or Qff or (ok' and (Ptf and Qtf <| tr'=tr and wait' |> Ptf or Qtf))) <| ok |> IDiv
+def EC(P,Q):
+    return Process(con(R(Or(And(P.relation(P.iv,P.fv), P.iv==iv, P.fv==fv, Not(ok(fv))), # Pff
+                            And(Q.relation(Q.iv,Q.fv), Q.iv==iv, Q.fv==fv, Not(ok(fv))), # Qff
+                            And(ok(fv), con(And(P.relation(P.iv,P.fv),Q.relation(Q.iv,Q.fv), P.iv==iv, Q.iv==iv, ok(P.fv),
+                                                wait(P.fv), tr(P.iv)==tr(P.fv), ok(Q.fv), wait(Q.fv), tr(Q.iv)==tr(Q.fv),
+                                                ref(fv)==Set.intersection (ref(P.fv),ref(Q.fv))),
+                                            And(tr(iv)==tr(fv), wait(fv)),
+                                            Or(And(P.relation(P.iv,P.fv), P.iv==iv, P.fv==fv),
+                                               And(Q.relation(Q.iv,Q.fv), Q.iv==iv, Q.fv==fv)))))),
+                       ok(iv),IDiv), "EC(" + P.expr + "," + Q.expr + ")")
+
+
+# internal choice
+# P |~| Q = R(¬Pff and ¬Qff |- Ptf or Qtf)
+# P|~|Q = R(Pff or Qff or (ok' and (Ptf or Qtf))) <| ok |> IDiv
+def IC(P, Q):
+    return Process(con(R(Or(And(P.relation(P.iv, P.fv), P.iv==iv, P.fv==fv, Not(ok(fv))),
+                            And(Q.relation(Q.iv, Q.fv), Q.iv==iv, Q.fv==fv, Not(ok(fv))),
+                            And(P.relation(P.iv, P.fv), P.iv==iv, P.fv==fv, ok(fv)),
+                            And(Q.relation(Q.iv, Q.fv), Q.iv==iv, Q.fv==fv, ok(fv)))),
+                       ok(iv), IDiv), "IC(" + P.expr + "," + Q.expr + ")")
+
+
+
+### Parallel Composition
+### P [| A |] Q = (ok'== P.ok' and Q.ok') and (wait'== P.wait' or Q.wait') and (tr'-tr==prod(A,P.tr'-P.tr,Q.tr'-Q.tr))
+###                ref' = union(inter(union(P.ref',Q.ref'),A), (inter(P.ref',Q.ref')\A)
+def Par(CS, P, Q):
+    r = Set.toSet(CS) # r is  the interface
+    return PProcess(CS, con(R(And(P.relation(P.iv, P.fv), Q.relation(Q.iv, Q.fv), P.iv==iv, Q.iv==iv,
+                                  ok(fv)==And(ok(P.fv), ok(Q.fv)), wait(fv)==Or(wait(P.fv), wait(Q.fv)),
+                                  diff(tr(P.fv), tr(iv), l1), diff(tr(Q.fv), tr(iv), l2), diff(tr(fv), tr(iv), l3),
+                                  parallel(next_process_index(), l1, l2, l3),
+                                  ref(fv)==(Set.union(Set.intersection(Set.union(ref(P.fv), ref(Q.fv)), r),
+                                                      Set.difference(Set.intersection(ref(P.fv), ref(Q.fv)), r))))),
+                           ok(iv), IDiv), "Par(" + str(CS) + "," + P.expr + "," + Q.expr + ")")
+
+
+
+### Hiding
+def Hide(P, CS):
+    r = Set.toSet(CS)
+    return PProcess(CS, con(R(And(P.relation(P.iv, P.fv), P.iv==iv,
+									  diff(tr(P.fv), tr(P.iv), l1),
+                                      diff(tr(fv), tr(P.iv), l), event_filter(next_process_index(),l1)==l,
+                                      ref(fv) == Set.union(ref(P.fv),r),
+                                      ref(P.fv) == Set.union(ref(fv),r),
+                                      ok(P.fv)==ok(fv), (wait(P.fv))==wait(fv))),
+						   ok(iv), IDiv), "Hide(" + P.expr + "," + str(CS) + ")")
+
+
+
+################################################################
+## Functions to enumerate all possible traces and refusal sets
+################################################################
+#initial state for a compound csp process; that is, ok is true, wait is false, tr is <> and ref is Fullset
+init = Tuple(True, False, nil, Fullset)
+
+
+# the context in which the processes were built;
+# the shared primitives can be checked together with processes of any context
+def context_of(*ps):
+    ctx = default_context
+    for P in ps:
+        if P.ctx is not default_context:
+            assert (ctx is default_context or ctx is P.ctx)
+            ctx = P.ctx
+    return ctx
+
+# the events of a trace and of a refusal of a model, as strings for the results
+def trace_of(t):
+    return [EventToString(e) for e in trace_events(t)]
+
+def refusal_of(r):
+    return [EventToString(e) for e in Set.toElements(r)]
+
+# the trace of some events, e.g., of a prefix of a trace of a model
+def trace_value(events):
+    t = nil
+    for e in reversed(events):
+        t = cons(e, t)
+    return simplify(t)
+
+# the observations of P satisfying a constraint on fv, lazily as the solver finds them: the model
+# values of the trace and the refusal. Each trace comes once, or with each of its refusals if
+# refusals is set. The scopes are popped when the generator is closed, so a caller may stop
+# early, but the solver of the context is not free for other checks until then. names are the
+# list functions the constraint uses, e.g., ['prefix'], whose definitions are asserted too.
+# With prefixes, the traces of the constraint are prefix closed, e.g., the stable ones, so the
+# prefixes of each trace found come too without a query of their own, with the refusal None
+# unless refusals is set
+def observations(P, constraint, refusals=False, names=[], prefixes=False):
+    ctx = context_of(P)
+    s = ctx.solver
+    s.push()
+    scopes = 1
+    try:
+        s.add(ctx.cone([P], names))
+        s.add(And(P.relation(P.iv, P.fv), P.iv == init, P.fv == fv, constraint))
+        # the traces found, as the names of their events
+        seen = set()
+        while s.check() != unsat:
+            m = s.model()
+            found = [(m[fv].children()[2], m[fv].children()[3])]
+            if prefixes:
+                events = trace_events(found[0][0])
+                seen.add(tuple(trace_of(found[0][0])))
+                for n in reversed(range(len(events))):
+                    k = tuple([EventToString(e) for e in events[:n]])
+                    if k in seen:
+                        # so are its prefixes
+                        break
+                    seen.add(k)
+                    found.append((trace_value(events[:n]), None))
+            for t, r in found:
+                if r is not None or not refusals:
+                    yield t, r
+                if refusals:
+                    # same trace but different refusals
+                    s.push()
+                    scopes += 1
+                    s.add(tr(fv) == t)
+                    if r is not None:
+                        s.add(ref(fv) != r)
+                    others = []
+                    result = s.check()
+                    while result == sat:
+                        r1 = s.model()[fv].children()[3]
+                        yield t, r1
+                        others.append(r1)
+                        s.add(ref(fv) != r1)
+                        result = s.check()
+                    s.pop()
+                    scopes -= 1
+                    if result != unsat and r is None:
+                        # the refusals of a prefix are not complete, e.g., the solver is unknown
+                        # on the quantified list encoding, so the trace is left to the loop of
+                        # the traces, without the refusals found
+                        s.add(Or(tr(fv) != t, And([ref(fv) != r1 for r1 in others])))
+                        continue
+                s.add(tr(fv) != t)
+    finally:
+        s.pop(scopes)
+
+# the constraints of the kinds of traces
+def trace_kind(kind):
+    if kind == 'terminated':
+        return And(ok(fv), Not(wait(fv)))
+    if kind == 'stable':
+        return ok(fv)
+    if kind == 'divergent':
+        return Not(ok(fv))
+    raise ValueError("unknown kind of traces " + str(kind))
+
+# the terminated, stable or divergent traces of P as lists of event names, e.g.,
+# for t in itertools.islice(iter_traces(P, kind='divergent'), 10): ...
+def iter_traces(P, kind='stable'):
+    for t, r in observations(P, trace_kind(kind), prefixes=kind == 'stable'):
+        yield trace_of(t)
+
+# the stable failures of P as pairs of a trace and a refusal
+def iter_failures(P):
+    for t, r in observations(P, ok(fv), True, prefixes=True):
+        yield trace_of(t), refusal_of(r)
+
+# show one trace for termination
+def ListOneTerminatedTrace(P):
+    ctx = context_of(P)
+    s = ctx.solver
+    result = Result('ListOneTerminatedTrace', s)
+    s.push()
+    s.add(ctx.cone([P]))
+    s.add(And(P.relation(P.iv, P.fv), P.iv == init, P.fv == fv, ok(fv), Not(wait(fv))))
+    if s.check()!=unsat:
+        t = s.model()[fv].children()[2]
+        report (t)
+        result.trace = trace_of(t)
+        result.done('terminates')
+    else:
+        result.done('no termination', "No solution!")
+    s.pop()
+    return result
+
+# show all terminated traces
+def ListAllTerminatedTraces(P):
+    result = Result('ListAllTerminatedTraces', context_of(P).solver)
+    for t, r in observations(P, trace_kind('terminated')):
+        report (t)
+        result.stable.append(trace_of(t))
+    return result.done('done', "Done")
+
+# show all traces which are deadlock or terminated
+def ListAllTraces(P):
+    result = Result('ListAllTraces', context_of(P).solver)
+    report ("Stable:")
+    for t, r in observations(P, ok(fv), prefixes=True):
+        report (t)
+        result.stable.append(trace_of(t))
+
+    report("Divergent:")
+    for t, r in observations(P, Not(ok(fv))):
+        report (t)
+        result.divergent.append(trace_of(t))
+    return result.done('done', "Done")
+
+# show all traces and their refusals including divergent traces
+def ListAllTracesAndRefs(P):
+    result = Result('ListAllTracesAndRefs', context_of(P).solver)
+    report ("Stable:")
+    for t, r in observations(P, ok(fv), True, prefixes=True):
+        refusal = Set.value(r)
+        report (t, refusal)
+        result.stable.append([trace_of(t), refusal_of(refusal)])
+
+    report("Divergent:")
+    for t, r in observations(P, Not(ok(fv))):
+        report (t)
+        result.divergent.append(trace_of(t))
+    return result.done('done', "Done")
+
+
+##########################################################
+#### Refinement ##########################################
+#### P refines Q iff P => Q ##############################
+#### TRef : check traces only
+#### SFRef: check traces and refusals
+#### DFRef: check failures and divergences
+##########################################################
+
+# check stable traces only; that is ok' is true and ignore any divergent trace.
+# Howe
+# single: one query for a trace of P which is not a trace of Q with the bounded encoding
+# of traces, see TRefSingleQuery
+def TRef(P,Q, single=False):
+    if single:
+        return TRefSingleQuery(P, Q)
+    ctx = context_of(P, Q)
+    s = ctx.solver
+    result = Result('TRef', s)
+    s.push() #1
+    s.add(ctx.cone([Q]))
+    # the traces of Q found, with their prefixes, which the traces of P come after
+    accepted = set()
+    traces = observations(P, ok(fv), prefixes=True)
+    for t, r in traces:
+        name = tuple(trace_of(t))
+        if name in accepted:
+            continue
+        report (t)
+
+        s.push() #2 for Q
+        s.add(And(Q.relation(Q.iv, Q.fv), Q.iv == init, ok(Q.fv), tr(Q.fv)==t))
+        found = s.check()==sat
+        s.pop() #2
+        if not found:
+            traces.close()
+            s.pop() #1
+            result.trace = list(name)
+            return result.done('not refined', "No refinement")
+        accepted |= set([name[:n] for n in range(len(name) + 1)])
+
+    s.pop() #1
+    return result.done('refined', "Refined!!!")
+
+# the predicate of a process, over its own variables
+def predicate_of(P):
+    if P.shared:
+        # the definition is for all variables: ForAll([iv, fv], re(iv, fv) == predicate)
+        return substitute_vars(definitions[P.relation.name()][0].body().arg(1), P.fv, P.iv)
+    return P.axioms[-1].arg(0)
+
+# the processes P depends on, including itself
+def cone_processes(P):
+    ps = {}
+    todo = [P]
+    while todo:
+        D = todo.pop()
+        if D.id not in ps:
+            ps[D.id] = D
+            todo.extend(D.deps)
+    return ps.values()
+
+# the predicate of P where each relation of a process it depends on is replaced by
+# the predicate of that process, so the behaviours of P do not depend on the relations
+def inline(P, done=None):
+    if done is None:
+        done = {}
+    if P.id not in done:
+        done[P.id] = substitute(predicate_of(P), *[(D.relation(D.iv, D.fv), inline(D, done)) for D in P.deps])
+    return done[P.id]
+
+# a value of Variables made of fresh variables for its fields, and those variables
+def fresh_variables(name):
+    t, ts = trace_variables(name + '_tr')
+    o, w, r = Bool(name + '_ok'), Bool(name + '_wait'), Const(name + '_ref', SetSort)
+    return Tuple(o, w, t, r), [o, w, r] + ts
+
+# trace refinement by one query: is there a stable trace of P such that for all variables
+# of the processes of Q, Q does not end with that trace? the relations of Q are inlined and
+# its variables are quantified field by field, so the quantified variables are of finite
+# sorts (and the length of a trace) with the bounded encoding of traces, see list.py.
+# With the recursive list functions, quantified over their definitions, the solver
+# finds wrong counterexamples, so the query needs the bounded encoding.
+# returns the counterexample or None
+def TRefSingleQuery(P, Q):
+    if trace_encoding != 'bounded':
+        raise ValueError("the single query of TRef needs the bounded encoding of traces, not " + trace_encoding)
+    ctx = context_of(P, Q)
+    s = ctx.solver
+    result = Result('TRef', s)
+    s.push()
+    s.add(ctx.cone([P, Q]))
+    s.add(And(P.relation(P.iv, P.fv), P.iv == init, P.fv == fv, ok(fv)))
+
+    variables = []
+    pairs = []
+    for D in cone_processes(Q):
+        for v in [D.iv, D.fv]:
+            value, vs = fresh_variables(str(v))
+            pairs.append((v, value))
+            variables += vs
+        if isinstance(D, PProcess):
+            for v in [D.pt1, D.pt2, D.pt3, D.pt]:
+                value, vs = trace_variables(str(v))
+                pairs.append((v, value))
+                variables += vs
+    behaviour = substitute(And(inline(Q), Q.iv == init, ok(Q.fv), tr(Q.fv) == tr(fv)), *pairs)
+    s.add(ForAll(variables, simplify(Not(behaviour))))
+
+    verdict = s.check()
+    if verdict == sat:
+        t = s.model()[fv].children()[2]
+        report (t)
+        result.trace = trace_of(t)
+        result.done('not refined', "No refinement")
+    elif verdict == unsat:
+        result.done('refined', "Refined!!!")
+    else:
+        result.done('unknown', "Unknown: " + s.reason_unknown())
+    s.pop()
+    return result
+
+# a fresh literal that activates a constraint only in the checks assuming it. The constraints
+# of a refinement check stay in one scope, so the solver keeps its learned lemmas across the
+# traces and refusals rather than losing them at each pop
+guard_index = 0
+
+def guard(s, constraint):
+    global guard_index
+    g = Bool('guard_%s' % guard_index)
+    guard_index += 1
+    s.add(Implies(g, constraint))
+    return g
+
+# the refusals of a trace of Q: with closed, as the failures of standard CSP, a refusal of P
+# only needs to be included in one of Q, otherwise they are the same maximal refusals.
+# covered keeps the refusals of Q found for the trace, so a refusal of P below one of them
+# needs no query; the result is the one of a check
+def hasRefusal(s, Q, t, r, closed, covered):
+    if not closed:
+        return s.check(guard(s, And(Q.relation(Q.iv, Q.fv), Q.iv == init, ok(Q.fv), tr(Q.fv) == t, ref(Q.fv) == r)))
+    if any([Set.value(r) <= q for q in covered]):
+        return sat
+    verdict = s.check(guard(s, And(Q.relation(Q.iv, Q.fv), Q.iv == init, ok(Q.fv), tr(Q.fv) == t, Set.subset(r, ref(Q.fv)))))
+    if verdict == sat:
+        covered.append(Set.value(s.model()[Q.fv].children()[3]))
+    return verdict
+
+# the refusals of P left for a trace after r: with closed only the ones not included in
+# a refusal found already, so the refusals of P checked are an antichain
+def otherRefusal(r, closed):
+    if closed:
+        return Not(Set.subset(ref(fv), r))
+    return ref(fv) != r
+
+# check stable traces and refusals
+def SFRef(P, Q, closed=False):
+    ctx = context_of(P, Q)
+    s = ctx.solver
+    result = Result('SFRef', s)
+    s.push()
+    s.add(ctx.cone([P, Q]))
+    p = guard(s, And(P.relation(P.iv, P.fv), P.iv == init, P.fv == fv, ok(fv)))
+
+    while s.check(p) != unsat:
+        m = s.model()
+        t = m[fv].children()[2]
+        r = m[fv].children()[3]
+        report (t, Set.value(r))
+        covered = []
+        #checking Q
+        if hasRefusal(s, Q, t, r, closed, covered) == unsat:
+            s.pop()
+            result.trace, result.refusal = trace_of(t), refusal_of(r)
+            return result.done('not refined', "No refinement")
+        # same trace but different refusals
+        same = guard(s, And(tr(fv)==t, otherRefusal(r, closed)))
+        while s.check(p, same) == sat:
+            m1 = s.model()
+            r1 = m1[fv].children()[3]
+            report (t, Set.value(r1))
+            #checning Q
+            if hasRefusal(s, Q, t, r1, closed, covered) != sat:
+                s.pop()
+                result.trace, result.refusal = trace_of(t), refusal_of(r1)
+                return result.done('not refined', "No refinement")
+            s.add(Implies(same, otherRefusal(r1, closed)))
+        s.add(Implies(p, tr(fv)!=t))
+    s.pop()
+    return result.done('refined', "Refined!!!")
+
+
+# refusla set
+
+#################################################################################
+# the procedure for Divergence-Failure is very complex because we record
+# the least observation for divergence rather than arbitrary Obs
+# So, we check non-divergent and divergent behaviours separately
+##################################################################################
+
+###############################################
+## auxiliary function for divergent checking
+###############################################
+
+def isDivergent(P):
+    ctx = context_of(P)
+    s = ctx.solver
+    s.push()
+    s.add(ctx.cone([P]))
+    s.add(And(P.relation(P.iv, P.fv), P.iv == init, P.fv == fv, Not(ok(fv))))
+    if s.check() != unsat:
+        s.pop()
+        return True
+    else:
+        s.pop()
+        return False
+
+# whether Q diverges after a prefix of t, which allows any behaviour after t
+def divergesBefore(s, Q, t):
+    return s.check(guard(s, And(Q.relation(Q.iv, Q.fv), Q.iv == init, Not(ok(Q.fv)), prefix(tr(Q.fv), t)))) != unsat
+
+# the stable traces and refusals of P are either ones of Q or after a divergence of Q;
+# the literal p activates the stable behaviours of P. the counterexample goes into result
+def StableRefineDivergent(s, P, Q, p, result, closed=False):
+    while s.check(p) != unsat:
+        m = s.model()
+        t = m[fv].children()[2]
+        r = m[fv].children()[3]
+        report (t, Set.value(r))
+        covered = []
+        # checking Q, whether the trace is included in Q
+        if hasRefusal(s, Q, t, r, closed, covered) == sat:
+            # same trace but different refusals
+            same = guard(s, And(tr(fv) == t, otherRefusal(r, closed)))
+            while s.check(p, same) == sat:
+                m1 = s.model()
+                r1 = m1[fv].children()[3]
+                report (t, Set.value(r1))
+                # checning Q
+                if hasRefusal(s, Q, t, r1, closed, covered) != sat:
+                    # check divergent trace
+                    if not divergesBefore(s, Q, t):
+                        result.trace, result.refusal = trace_of(t), refusal_of(r1)
+                        result.done('not refined', "No refinement")
+                        return False
+                s.add(Implies(same, otherRefusal(r1, closed)))
+        else:
+            # check divergent trace
+            if not divergesBefore(s, Q, t):
+                result.trace, result.refusal = trace_of(t), refusal_of(r)
+                result.done('not refined', "No refinement!!!")
+                return False # exit the first while loop
+        s.add(Implies(p, tr(fv) != t))
+    return True
+
+# P is non-divergent and Q is divergent
+def NonDivergentRefineDivergent(P, Q, closed=False):
+    ctx = context_of(P, Q)
+    s = ctx.solver
+    result = Result('FDRef', s)
+    s.push()
+    s.add(ctx.cone([P, Q], ['prefix' + model_name]))
+    p = guard(s, And(P.relation(P.iv, P.fv), P.iv == init, P.fv == fv, ok(fv)))
+    if StableRefineDivergent(s, P, Q, p, result, closed):
+        result.done('refined', "Refined!!!")
+    s.pop()
+    return result
+
+def DivergentRefineDivergent(P, Q, closed=False):
+    ctx = context_of(P, Q)
+    s = ctx.solver
+    result = Result('FDRef', s)
+    s.push()
+    s.add(ctx.cone([P, Q], ['prefix' + model_name]))
+    p = guard(s, And(P.relation(P.iv, P.fv), P.iv == init, P.fv == fv, ok(fv)))
+    if not StableRefineDivergent(s, P, Q, p, result, closed):
+        s.pop()
+        return result
+
+    ###################
+    # check divergence
+    p = guard(s, And(P.relation(P.iv, P.fv), P.iv == init, P.fv == fv, Not(ok(fv))))
+    while s.check(p) != unsat:
+        m = s.model()
+        t = m[fv].children()[2]
+        report(t, "Divergent")
+        if not divergesBefore(s, Q, t):
+            s.pop()
+            result.trace = trace_of(t)
+            return result.done('not refined', "No Refinement!!!")
+        s.add(Implies(p, tr(fv) != t))
+    s.pop()
+    return result.done('refined', "refined!!!")
+
+# failure-divergence model; closed as for SFRef
+def FDRef(P, Q, closed=False):
+    result = Result('FDRef', context_of(P, Q).solver)
+    DoP = isDivergent(P)
+    DoQ = isDivergent(Q)
+    # P and Q are non-divergent, so use SFRef for refinement
+    if DoP==False and DoQ==False:
+        checked = SFRef(P, Q, closed)
+    # If P is divergent and Q is not, then P cannot refine Q
+    elif DoP==True and DoQ==False: #
+        return result.done('not refined', "No refinement")
+    elif DoP==False and DoQ==True:
+        checked = NonDivergentRefineDivergent(P, Q, closed)
+    else:
+        checked = DivergentRefineDivergent(P, Q, closed)
+    result.trace, result.refusal = checked.trace, checked.refusal
+    return result.done(checked.verdict)
+
+########################################
+## deadlock free and divergence free
+########################################
+
+# deadlock free
+def DLF(P):
+    ctx = context_of(P)
+    s = ctx.solver
+    result = Result('DLF', s)
+    s.push()
+    s.add(ctx.cone([P]))
+    s.add(And(P.relation(P.iv, P.fv), P.iv == init, P.fv == fv, wait(fv), ref(fv)==Fullset))
+    verdict = s.check()
+    if verdict == sat:
+        v = s.model()[fv]
+        report (v)
+        result.trace, result.refusal = trace_of(v.children()[2]), refusal_of(v.children()[3])
+        result.done('deadlock', "Deadlock!!!")
+    elif verdict == unknown:
+        result.done('unknown', "Unknown: " + s.reason_unknown())
+    else:
+        result.done('deadlock free', "Deadlock Free!!!")
+    s.pop()
+    return result
+
+# divergence free
+def DVF(P):
+    ctx = context_of(P)
+    s = ctx.solver
+    result = Result('DVF', s)
+    s.push()
+    s.add(ctx.cone([P]))
+    s.add(And(P.relation(P.iv, P.fv), P.iv == init, P.fv == fv, Not(ok(fv))))
+    verdict = s.check()
+    if verdict == sat:
+        v = s.model()[fv]
+        report (v)
+        result.trace = trace_of(v.children()[2])
+        result.done('divergent', "Divergent!!!")
+    elif verdict == unknown:
+        result.done('unknown', "Unknown: " + s.reason_unknown())
+    else:
+        result.done('divergence free', "Divergent Free!!!")
+    s.pop()
+    return result
+
+#########################################################
+## Recursive Processes, which support mutal recursion
+#########################################################
+
+class RecP:
+    def __init__(self, body, round):
+        self.body = body
+        self.vl = []
+        self.pl = []
+        self.round = round
+
+    def setup(self, vl, pl):
+        self.vl = vl
+        self.pl = pl
+
+    def create(self):
+        expr = self.copy(self.round)
+        return eval(expr)
+
+    def copy(self, round):
+        if round == 0:
+            return 'Skip'
+        else:
+            body = self.body
+            for i in range(len(self.pl)):
+                body = body.replace(self.vl[i], self.pl[i].copy(round-1))
+            return body
+
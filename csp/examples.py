@@ -1,75 +1,112 @@
-#####################################################
-## Kun Wei 26/06/2018
-## uncomment the processes to use these examples
-#####################################################
-
-from csp import *
-############################################################
-#e1.
-# P = a->Skip [] b->Skip
-# Q = a->Skip |~| b->Skip
-
-#P = EC(SP(a), SP(b))
-#Q = IC(SP(a), SP(b))
-
-# checked all traces in P as <>, <a>,<b>, and refined
-#TRef(P,Q)
-
-# unrefined, because P has (<>, {c,d}), which is not included in Q
-#SFRef(P,Q)
-
-###############################################################
-#e2.
-# P = a->b->Skip ||[b] b->c->Skip
-#P = Par([b], Seq(SP(a),SP(b)), Seq(SP(b), SP(c)))
-
-# show all traces
-#ListAllTraces(P)
-
-# show all traces and related refusal sets
-#ListAllTracesAndRefs(P)
-
-#deadlock checking
-#DLF(P)
-
-#deadlock checking again
-#Q = Par([a,b], Seq(SP(a),SP(b)), Seq(SP(b), SP(c)))
-#DLF(Q)
-
-#################################################################
-#e3.
-# Hiding
-# P = (a->c->Skip [] b->Skip)\{a}
-# Q = c->Skip [] b-> Skip
-# S = c->Skip |~| b->Skip
-# Are they or two of them are same?
-#P = Hide(EC(Seq(SP(a),SP(c)), SP(b)), [a])
-#Q = EC(SP(c), SP(b))
-#S = IC(SP(c), SP(b))
-
-#ListAllTracesAndRefs(P)
-#ListAllTracesAndRefs(Q)
-#ListAllTracesAndRefs(S)
-
-#SFRef(P,S)
-#SFRef(S,P)
-
-######################################################################
-#e4.
-# mutually recursive processes
-# P = a->P [] b->Q
-# Q = a -> Q [] b->P
-
-#X = RecP('EC(Seq(SP(a),X), Seq(SP(b),Y))', 2)
-#Y = RecP('EC(Seq(SP(a),Y), Seq(SP(b),X))', 2)
-#X.setup(['X', 'Y'], [X,Y])
-#Y.setup(['X', 'Y'], [X,Y])
-#P = X.create()
-#Q = Y.create()
-
-#Z = RecP('EC(Seq(SP(a),Z), Seq(SP(b),Z))', 2)
-#Z.setup(['Z'], [Z])
-#S = Z.create()
-
-#TRef(S, P)
-#FDRef(S,P)
+#####################################################
+## Kun Wei 26/06/2018
+## uncomment the processes to use these examples
+#####################################################
+
+from csp import *
+import term, lts
+
+# print the behaviours and verdicts as the checks find them
+set_reporter(console)
+############################################################
+#e1.
+# P = a->Skip [] b->Skip
+# Q = a->Skip |~| b->Skip
+
+#P = EC(SP(a), SP(b))
+#Q = IC(SP(a), SP(b))
+
+# checked all traces in P as <>, <a>,<b>, and refined
+#TRef(P,Q)
+
+# unrefined, because P has (<>, {c,d}), which is not included in Q
+#SFRef(P,Q)
+
+# refined if the refusals are subset-closed as in standard CSP, because {c,d}
+# is included in the refusal {b,c,d} of Q
+#SFRef(P,Q,closed=True)
+
+###############################################################
+#e2.
+# P = a->b->Skip ||[b] b->c->Skip
+#P = Par([b], Seq(SP(a),SP(b)), Seq(SP(b), SP(c)))
+
+# show all traces
+#ListAllTraces(P)
+
+# show all traces and related refusal sets
+#ListAllTracesAndRefs(P)
+
+#deadlock checking
+#DLF(P)
+
+#deadlock checking again
+#Q = Par([a,b], Seq(SP(a),SP(b)), Seq(SP(b), SP(c)))
+#DLF(Q)
+
+#################################################################
+#e3.
+# Hiding
+# P = (a->c->Skip [] b->Skip)\{a}
+# Q = c->Skip [] b-> Skip
+# S = c->Skip |~| b->Skip
+# Are they or two of them are same?
+#P = Hide(EC(Seq(SP(a),SP(c)), SP(b)), [a])
+#Q = EC(SP(c), SP(b))
+#S = IC(SP(c), SP(b))
+
+#ListAllTracesAndRefs(P)
+#ListAllTracesAndRefs(Q)
+#ListAllTracesAndRefs(S)
+
+#SFRef(P,S)
+#SFRef(S,P)
+
+######################################################################
+#e4.
+# mutually recursive processes
+# P = a->P [] b->Q
+# Q = a -> Q [] b->P
+
+#X = RecP('EC(Seq(SP(a),X), Seq(SP(b),Y))', 2)
+#Y = RecP('EC(Seq(SP(a),Y), Seq(SP(b),X))', 2)
+#X.setup(['X', 'Y'], [X,Y])
+#Y.setup(['X', 'Y'], [X,Y])
+#P = X.create()
+#Q = Y.create()
+
+#Z = RecP('EC(Seq(SP(a),Z), Seq(SP(b),Z))', 2)
+#Z.setup(['Z'], [Z])
+#S = Z.create()
+
+#TRef(S, P)
+#FDRef(S,P)
+
+
+######################################################################
+#e5.
+# checking in a separate context, so the processes of previous checks
+# are not carried by the solver
+#with CheckContext():
+#    P = Par([b], Seq(SP(a),SP(b)), Seq(SP(b), SP(c)))
+#    DLF(P)
+
+
+######################################################################
+#e6.
+# the same recursion as e4 built from hash-consed terms, see term.py
+#X = term.Rec('X', {'X': term.EC(term.Seq(term.SP(a), term.Var('X')), term.Seq(term.SP(b), term.Var('Y'))),
+#                   'Y': term.EC(term.Seq(term.SP(a), term.Var('Y')), term.Seq(term.SP(b), term.Var('X')))}, 2)
+#Z = term.Rec('Z', {'Z': term.EC(term.Seq(term.SP(a), term.Var('Z')), term.Seq(term.SP(b), term.Var('Z')))}, 2)
+#TRef(term.encode(Z), term.encode(X))
+
+
+######################################################################
+#e7.
+# the same checks by the explicit-state semantics of lts.py, where the
+# recursion needs no bound, and compared with the Z3 semantics
+#X = term.Rec('X', {'X': term.EC(term.Seq(term.SP(a), term.Var('X')), term.Seq(term.SP(b), term.Var('Y'))),
+#                   'Y': term.EC(term.Seq(term.SP(a), term.Var('Y')), term.Seq(term.SP(b), term.Var('X')))}, None)
+#Z = term.Rec('Z', {'Z': term.EC(term.Seq(term.SP(a), term.Var('Z')), term.Seq(term.SP(b), term.Var('Z')))}, None)
+#lts.FDRef(Z, X)
+#lts.compare('SFRef', term.EC(term.SP(a), term.SP(b)), term.IC(term.SP(a), term.SP(b)))
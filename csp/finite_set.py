@@ -1,88 +1,171 @@
-##################################################################
-# The finite set theory based on BitVec
-# Kun Wei 17/05/2017
-##################################################################
-
-
-from z3 import *
-
-class FSetDecl():
-    def __init__(self, l):
-        self.alphabet = l
-        self.size = len(l)
-
-    def declare(self, name):
-        return BitVec(name, self.size)
-
-    def union(self, s1, s2):
-        assert (s1.sort() == s2.sort())
-        return s1|s2
-
-    def intersection(self, s1, s2):
-        assert (s1.sort() == s2.sort())
-        return s1&s2
-
-    def complement(self, s):
-        return ~s
-
-    def difference(self, s1, s2):
-        assert (s1.sort() == s2.sort())
-        return self.intersection(s1, self.complement(s2))
-
-    def member(self, e, s):
-        index = self.alphabet.index(e)
-        be = BitVecVal(1, self.size)<<index
-        #print(be)
-        return (be & s)!= 0
-
-    def add(self, e, s):
-        index = self.alphabet.index(e)
-        be = BitVecVal(1, self.size) << index
-        #print(be)
-        return (be | s)
-
-    def emptyset(self):
-        return BitVecVal(0, self.size)
-
-    def fullset(self):
-        return ~BitVecVal(0, self.size)
-
-    def toElements(self, b):
-        s = []
-        be = BitVecVal(1,self.size)
-        for i in range(self.size):
-            t = simplify(b&(be<<i))
-            if not (t == 0):
-                s.append(self.alphabet[i])
-        return s
-
-    def toSet(self,l):
-        s = self.emptyset()
-        for i in range(len(l)):
-            s = self.add(l[i], s)
-        return s
-
-# define a finite set sort
-def FSetSort(l): # l is a list of all elements in the finite set
-    return BitVecSort(len(l))
-
-
-### for testing
-#Channel, (a,b,c,d) = EnumSort('Channel', ('a','b','c','d'))
-#FSet = FSetDecl([a,b,c,d])
-
-#print(simplify(FSet.toSet([a,b,c])))
-
-#s1 = FSet.declare('s1')
-#s2 = FSet.declare('s2')
-#s = Solver()
-#s.add(s1== FSet.add(b,FSet.add(a,FSet.emptyset())))
-#s.add(s2== FSet.add(c,FSet.add(a,FSet.emptyset())))
-
-#print(FSet.toElements(BitVecVal(14,4)))
-#s.add(FSet.union(s1,s2) == FSet.add(c, FSet.add(b,FSet.add(a,FSet.emptyset()))))
-#s.add(FSet.intersection(s1,s2) == FSet.add(a,FSet.emptyset()) )
-#s.add(FSet.complement(s1) == FSet.add(c, FSet.add(d, FSet.emptyset())))
-#s.add(FSet.difference(s1,s2) == FSet.add(b, FSet.emptyset()))
-
+##################################################################
+# The finite set theory based on BitVec
+# Kun Wei 17/05/2017
+##################################################################
+
+
+from z3 import *
+
+# NumPy decodes many sets at once, see toMatrix, if it is installed
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+class FSetDecl():
+    def __init__(self, l):
+        self.alphabet = l
+        self.size = len(l)
+        # the index of each element by the id of its term
+        self.indices = dict([(e.get_id(), i) for i, e in enumerate(l)])
+
+    def declare(self, name):
+        return BitVec(name, self.size)
+
+    def union(self, s1, s2):
+        assert (s1.sort() == s2.sort())
+        return s1|s2
+
+    def intersection(self, s1, s2):
+        assert (s1.sort() == s2.sort())
+        return s1&s2
+
+    def complement(self, s):
+        return ~s
+
+    def difference(self, s1, s2):
+        assert (s1.sort() == s2.sort())
+        return self.intersection(s1, self.complement(s2))
+
+    # s1 is a subset of s2
+    def subset(self, s1, s2):
+        assert (s1.sort() == s2.sort())
+        return s1 & ~s2 == 0
+
+    def member(self, e, s):
+        index = self.indices[e.get_id()]
+        be = BitVecVal(1, self.size)<<index
+        #print(be)
+        return (be & s)!= 0
+
+    def add(self, e, s):
+        index = self.indices[e.get_id()]
+        be = BitVecVal(1, self.size) << index
+        #print(be)
+        return (be | s)
+
+    def emptyset(self):
+        return BitVecVal(0, self.size)
+
+    def fullset(self):
+        return ~BitVecVal(0, self.size)
+
+    # the bitmask of a set of a model, e.g., a refusal, read from its value without the solver
+    def mask(self, b):
+        if isinstance(b, FSetValue):
+            return b.mask
+        if not is_bv_value(b):
+            b = simplify(b)
+        return b.as_long()
+
+    # a set of a model as a Python value, which compares and prints without the solver
+    def value(self, b):
+        return FSetValue(self, self.mask(b))
+
+    def maskToElements(self, m):
+        return [self.alphabet[i] for i in range(self.size) if m >> i & 1]
+
+    def toElements(self, b):
+        return self.maskToElements(self.mask(b))
+
+    # the membership of the elements in many sets, a row of booleans for each set, decoded
+    # at once by NumPy from the 64-bit words of the masks, or by Python without it
+    def toMatrix(self, bs):
+        masks = [self.mask(b) for b in bs]
+        if numpy is None:
+            return [[m >> i & 1 == 1 for i in range(self.size)] for m in masks]
+        words = (self.size + 63) // 64
+        a = numpy.array([[m >> (64 * w) & 0xFFFFFFFFFFFFFFFF for w in range(words)] for m in masks],
+                        dtype='<u8').reshape(len(masks), words)
+        return numpy.unpackbits(a.view(numpy.uint8), axis=1, bitorder='little')[:, :self.size].astype(bool)
+
+    # the elements of many sets, e.g., of the refusals of a listing
+    def toElementsMany(self, bs):
+        return [[self.alphabet[i] for i in range(self.size) if row[i]] for row in self.toMatrix(bs)]
+
+    def toSet(self,l):
+        s = self.emptyset()
+        for i in range(len(l)):
+            s = self.add(l[i], s)
+        return s
+
+# a set of a model decoded as the bitmask of the indices of its elements in the alphabet
+class FSetValue():
+    __slots__ = ('decl', 'mask')
+
+    def __init__(self, decl, mask):
+        self.decl = decl
+        self.mask = mask
+
+    def elements(self):
+        return self.decl.maskToElements(self.mask)
+
+    def __iter__(self):
+        return iter(self.elements())
+
+    def __len__(self):
+        return bin(self.mask).count('1')
+
+    def __contains__(self, e):
+        return self.mask >> self.decl.indices[e.get_id()] & 1 == 1
+
+    def __eq__(self, other):
+        return isinstance(other, FSetValue) and self.mask == other.mask
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.mask)
+
+    # self is a subset of other
+    def __le__(self, other):
+        return self.mask & ~other.mask == 0
+
+    def __or__(self, other):
+        return FSetValue(self.decl, self.mask | other.mask)
+
+    def __and__(self, other):
+        return FSetValue(self.decl, self.mask & other.mask)
+
+    def __sub__(self, other):
+        return FSetValue(self.decl, self.mask & ~other.mask)
+
+    # printed as the list of its elements, as toElements did for the reports of the checks
+    def __repr__(self):
+        return repr(self.elements())
+
+# define a finite set sort
+def FSetSort(l): # l is a list of all elements in the finite set
+    return BitVecSort(len(l))
+
+
+### for testing
+#Channel, (a,b,c,d) = EnumSort('Channel', ('a','b','c','d'))
+#FSet = FSetDecl([a,b,c,d])
+
+#print(simplify(FSet.toSet([a,b,c])))
+
+#s1 = FSet.declare('s1')
+#s2 = FSet.declare('s2')
+#s = Solver()
+#s.add(s1== FSet.add(b,FSet.add(a,FSet.emptyset())))
+#s.add(s2== FSet.add(c,FSet.add(a,FSet.emptyset())))
+
+#print(FSet.toElements(BitVecVal(14,4)))
+#s.add(FSet.union(s1,s2) == FSet.add(c, FSet.add(b,FSet.add(a,FSet.emptyset()))))
+#s.add(FSet.intersection(s1,s2) == FSet.add(a,FSet.emptyset()) )
+#s.add(FSet.complement(s1) == FSet.add(c, FSet.add(d, FSet.emptyset())))
+#s.add(FSet.difference(s1,s2) == FSet.add(b, FSet.emptyset()))
+
 #print(s.check())
\ No newline at end of file
@@ -1,5 +1,144 @@
-from z3 import *
-
-default_solver = Solver()
-#global_process_index = Int('index')
-global_process_index = 0
+from z3 import *
+
+#global_process_index = Int('index')
+global_process_index = 0
+
+# a fresh index of a process and the index of the next one; the copies of csp.py
+# of the models of model.py share them, so their relations have distinct names
+def new_process_index():
+    global global_process_index
+    global_process_index += 1
+    return global_process_index - 1
+
+def next_process_index():
+    return global_process_index
+
+# the name of the model whose copies of list.py and csp.py are being loaded, see
+# model.py; the names of its list functions end with it
+model_name = ''
+
+# the encoding of traces, see list.py: 'list' for the recursive list datatype whose
+# functions are quantified definitions, 'bounded' for the traces of at most
+# trace_bound events whose functions are quantifier-free formulas, or 'seq' for
+# the sequence theory of Z3
+trace_encoding = 'list'
+trace_bound = 8
+
+# the seq encoding needs the sequence solver of z3 4.12 or later: the one of 4.5.1 crashes
+# on the incremental checks of e4 of examples.py, after listing some behaviours twice
+seq_version = (4, 12, 0)
+
+def seq_supported():
+    return get_version() >= seq_version
+
+###########################################################
+## Check contexts
+## A context owns its own solver and a registry of the processes
+## built in it. Each query only asserts the axioms in the cone of
+## influence of its operands within a push/pop scope, so a context can
+## be thrown away and a new check starts with a clean solver.
+##
+## with CheckContext() as ctx:
+##     P = EC(SP(a), SP(b))
+##     DLF(P)
+###########################################################
+
+# the recursive definitions of the list functions, indexed by the function name;
+# a query only asserts the definitions used by the processes it involves
+definitions = {}
+
+# names of all functions applied in an expression
+def applied_names(e):
+    names = set()
+    seen = set()
+    todo = [e]
+    while todo:
+        t = todo.pop()
+        if t.get_id() in seen:
+            continue
+        seen.add(t.get_id())
+        if is_quantifier(t):
+            todo.append(t.body())
+        elif is_app(t):
+            names.add(t.decl().name())
+            todo.extend(t.children())
+    return names
+
+# a solver counting its checks, for the results of the queries
+class CountingSolver(Solver):
+    def __init__(self):
+        Solver.__init__(self)
+        self.calls = 0
+
+    def check(self, *assumptions):
+        self.calls += 1
+        return Solver.check(self, *assumptions)
+
+class CheckContext:
+    def __init__(self):
+        self.solver = CountingSolver()
+        self.processes = {}
+        # the processes encoding the terms of term.py, see encode()
+        self.encoded = {}
+
+    def register(self, P):
+        self.processes[P.id] = P
+
+    # processes of this context or the shared primitives of the default one
+    def lookup(self, id):
+        if id in self.processes:
+            return self.processes[id]
+        return default_context.processes[id]
+
+    # the cone of influence of some processes: the axioms of every process
+    # reachable from them plus the definitions of the list functions they use,
+    # in the order of the process ids and the function names so that the
+    # solver sees the same query on every run
+    def cone(self, ps, names=[]):
+        reached = {}
+        todo = list(ps)
+        while todo:
+            P = todo.pop()
+            if P.id in reached:
+                continue
+            reached[P.id] = P
+            todo.extend(P.deps)
+        axioms = []
+        calls = set(names)
+        for id in sorted(reached):
+            axioms.extend(reached[id].axioms)
+            calls |= reached[id].calls
+        used = set()
+        todo = list(calls)
+        while todo:
+            name = todo.pop()
+            if name in used or name not in definitions:
+                continue
+            used.add(name)
+            todo.extend(definitions[name][1])
+        axioms.extend(definitions[name][0] for name in sorted(used))
+        return axioms
+
+    # assert the cone of some processes for good, e.g., for hand-written queries
+    def load(self, *ps):
+        self.solver.add(self.cone(ps))
+
+    def __enter__(self):
+        context_stack.append(self)
+        return self
+
+    def __exit__(self, *args):
+        context_stack.pop()
+
+default_context = CheckContext()
+default_solver = default_context.solver
+
+context_stack = [default_context]
+
+def current_context():
+    return context_stack[-1]
+
+# record the definition of a recursive function built by mk_rec
+def define(axiom):
+    name = axiom.body().arg(0).decl().name()
+    definitions[name] = (axiom, applied_names(axiom.body()))
@@ -0,0 +1,93 @@
+##################################################################
+## Bounded traces
+## A trace is a record of its length and trace_bound slots of events.
+## The slots after the length always hold the first event of the
+## alphabet, so each trace has exactly one value. prefix, diff,
+## parallel and event_filter are unrolled into quantifier-free
+## formulas, so every check stays in a decidable fragment. A trace
+## longer than trace_bound is not a behaviour of any process, i.e.,
+## the checks are complete for the traces up to the bound only.
+##
+## import init
+## init.trace_encoding = 'bounded'
+## init.trace_bound = 6
+## from csp import *
+##################################################################
+
+from init import *
+from event import *
+from list_unrolled import parallel_over
+
+k = trace_bound
+
+List = Datatype('List' + model_name)
+List.declare('trace', ('length', IntSort()), *[('e%s' % i, Event) for i in range(k)])
+List = List.create()
+
+length = List.length
+slots = [getattr(List, 'e%s' % i) for i in range(k)]
+
+# the event in the empty slots
+blank = Set.alphabet[0]
+
+def slot(t, i):
+    return slots[i](t)
+
+nil = List.trace(0, *[blank for i in range(k)])
+
+def cons(e, t):
+    return List.trace(length(t) + 1, e, *[slot(t, i) for i in range(k - 1)])
+
+# list variables
+l =  Const('l', List)
+l1 = Const('l1', List)
+l2 = Const('l2', List)
+l3 = Const('l3', List)
+
+# a trace made of fresh variables for its length and slots, and those variables
+def trace_variables(name):
+    n = Int(name + '_length')
+    es = [Const(name + '_e%s' % i, Event) for i in range(k)]
+    return List.trace(n, *es), [n] + es
+
+# the events of a trace value of a model
+def trace_events(t):
+    return [t.arg(i + 1) for i in range(t.arg(0).as_long())]
+
+# the length is in the bound and the empty slots are blank
+def wellformed(t):
+    return And(length(t) >= 0, length(t) <= k, *[Implies(length(t) <= i, slot(t, i) == blank) for i in range(k)])
+
+#check whether a list of is the prefix of the other, e.g., prefix(<a>,<a,b>) is TRUE
+def prefix(t1, t2):
+    return And(length(t1) <= length(t2), *[Implies(i < length(t1), slot(t1, i) == slot(t2, i)) for i in range(k)])
+
+# the difference of two lists, e.g., t2-t1 or difference(<a,a,b>,<a>,<a,b>) is TRUE
+# for each length n of t1, the j-th event of l is the (n+j)-th event of t2
+def diff(t2, t1, l):
+    return And(wellformed(t2), wellformed(l), length(t2) == length(t1) + length(l), prefix(t1, t2),
+               *[Implies(And(length(t1) == n, j < length(l)), slot(t2, n + j) == slot(l, j))
+                 for n in range(k) for j in range(k - n)])
+
+
+# a special set for parallelism and hiding, and it uses different ids to identify different sets for different processes
+interface = Function('interface', IntSort(), Event, BoolSort())
+
+# parallel composition of two lists, see list_unrolled.py
+def parallel(id, l1, l2, l3):
+    return parallel_over(k, length, slot, interface, id, l1, l2, l3)
+
+#filter for hiding, <a,a,b>\{a} = <b>
+# the j-th event of the result is the i-th event of l which is the j-th one not in the interface
+def event_filter(id, l):
+    kept = [And(i < length(l), Not(interface(id, slot(l, i)))) for i in range(k)]
+    count = [IntVal(0)]
+    for i in range(k):
+        count.append(count[i] + If(kept[i], 1, 0))
+    events = []
+    for j in range(k):
+        e = blank
+        for i in reversed(range(j, k)):
+            e = If(And(kept[i], count[i] == j), slot(l, i), e)
+        events.append(e)
+    return List.trace(count[k], *events)
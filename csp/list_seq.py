@@ -0,0 +1,75 @@
+##################################################################
+## Traces in the sequence theory of Z3
+## A trace is a sequence of events, so prefix is PrefixOf and
+## the difference of two traces is a concatenation. The sequence
+## solver does not handle the recursive definitions of parallel and
+## event_filter (the checks return unknown), so both are unrolled
+## over the first trace_bound events as in list_bounded.py:
+## a parallel composition of longer traces does not exist, and
+## event_filter drops the events after the bound. It needs z3 4.12
+## or later, see seq_supported() in init.py.
+##
+## import init
+## init.trace_encoding = 'seq'
+## from csp import *
+##################################################################
+
+from init import *
+from event import *
+from list_unrolled import parallel_over
+
+k = trace_bound
+
+List = SeqSort(Event)
+
+nil = Empty(List)
+
+def cons(e, t):
+    return Concat(Unit(e), t)
+
+# list variables
+l =  Const('l', List)
+l1 = Const('l1', List)
+l2 = Const('l2', List)
+l3 = Const('l3', List)
+
+# a trace variable, as a list of the variables it is made of
+def trace_variables(name):
+    t = Const(name, List)
+    return t, [t]
+
+# the events of a trace value of a model: a concatenation of units
+def trace_events(t):
+    if t.decl().name() == 'seq.unit':
+        return [t.arg(0)]
+    return sum([trace_events(c) for c in t.children()], [])
+
+# the i-th event of a trace as a unit sequence
+def slot(t, i):
+    return Extract(t, i, 1)
+
+#check whether a list of is the prefix of the other, e.g., prefix(<a>,<a,b>) is TRUE
+def prefix(t1, t2):
+    return PrefixOf(t1, t2)
+
+# the difference of two lists, e.g., t2-t1 or difference(<a,a,b>,<a>,<a,b>) is TRUE
+def diff(t2, t1, l):
+    return t2 == Concat(t1, l)
+
+
+# a special set for parallelism and hiding, and it uses different ids to identify different sets for different processes
+# the events are unit sequences, since the slots of a trace are
+interface_unit = Function('interface', IntSort(), List, BoolSort())
+
+def interface(id, e):
+    if e.sort() == Event:
+        e = Unit(e)
+    return interface_unit(id, e)
+
+# parallel composition of two lists, see list_unrolled.py
+def parallel(id, l1, l2, l3):
+    return parallel_over(k, Length, slot, interface, id, l1, l2, l3)
+
+#filter for hiding, <a,a,b>\{a} = <b>
+def event_filter(id, l):
+    return Concat(*[If(And(i < Length(l), Not(interface(id, slot(l, i)))), slot(l, i), nil) for i in range(k)])
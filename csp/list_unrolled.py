@@ -0,0 +1,37 @@
+##################################################################
+## Unrolled list functions
+## The functions of the trace encodings which are unrolled over
+## the first trace_bound events rather than defined recursively,
+## see list_bounded.py and list_seq.py. Each encoding gives its
+## own length of a trace, its i-th slot and interface.
+##################################################################
+
+from z3 import *
+
+
+# parallel composition of two lists: reach[i,j,n] is whether the first n events of l3
+# are a composition of the first i events of l1 and the first j events of l2.
+# the formula is a DAG of O(k^3) nodes as z3 shares the common sub-formulas
+def parallel_over(k, length, slot, interface, id, l1, l2, l3):
+    reach = {}
+    cases = []
+    for i in range(k + 1):
+        for j in range(k + 1):
+            for n in range(k + 1):
+                if n < max(i, j) or n > i + j:
+                    continue
+                if n == 0:
+                    reach[i, j, n] = BoolVal(True)
+                else:
+                    e = slot(l3, n - 1)
+                    steps = []
+                    if (i - 1, j - 1, n - 1) in reach:
+                        steps.append(And(reach[i - 1, j - 1, n - 1], slot(l1, i - 1) == e, slot(l2, j - 1) == e,
+                                         interface(id, e)))
+                    if (i - 1, j, n - 1) in reach:
+                        steps.append(And(reach[i - 1, j, n - 1], slot(l1, i - 1) == e, Not(interface(id, e))))
+                    if (i, j - 1, n - 1) in reach:
+                        steps.append(And(reach[i, j - 1, n - 1], slot(l2, j - 1) == e, Not(interface(id, e))))
+                    reach[i, j, n] = Or(steps) if steps else BoolVal(False)
+                cases.append(And(length(l1) == i, length(l2) == j, length(l3) == n, reach[i, j, n]))
+    return Or(cases)
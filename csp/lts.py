@@ -0,0 +1,521 @@
+##########################################################
+## Explicit-state semantics of the process terms
+## A state is a term of term.py. Its initials are the observations
+## it makes before any event, i.e., a refusal for waiting (a bit
+## mask over the alphabet, as the sets of finite_set.py), 'done'
+## for termination or ('div', refusal) for divergence, and the
+## states after each event; hidden events are closed over, so every
+## transition is visible. The observations are the ones of the Z3
+## semantics of csp.py, e.g., a refusal is maximal and Par combines
+## the refusals as its predicate does, so both give the same
+## verdicts; compare() runs a check by both. The recursion needs
+## no bound, e.g., Rec('X', {'X': Seq(SP(a), Var('X'))}, None).
+##
+## P = Par([b], Seq(SP(a), SP(b)), Seq(SP(b), SP(c)))
+## DLF(P)
+## compare('DLF', P)
+##########################################################
+
+from term import *
+import term
+import csp
+from collections import deque
+
+
+# the name of an event: its string for the events of event.py, or itself, e.g.,
+# for the models whose events are strings
+def label(e):
+    if is_expr(e):
+        return EventToString(e)
+    return e
+
+# the search explored more states than its budget, e.g., of a recursion which grows the term
+class Exhausted(ValueError):
+    pass
+
+class LTS:
+    def __init__(self, alphabet=None, budget=None):
+        if alphabet is None:
+            alphabet = Set.alphabet
+        # the order of the events for the bits of the refusals
+        self.order = [label(e) for e in alphabet]
+        self.bits = dict([(e, 1 << i) for i, e in enumerate(self.order)])
+        self.alphabet = (1 << len(self.order)) - 1
+        # the initials of each state, see initials()
+        self.table = {}
+        # the recursions being unfolded, for unguarded recursion
+        self.unfolding = set()
+        # the names and the mask of the event sets of Par and Hide
+        self.sets = {}
+        # the states of Par, see par()
+        self.parallel = {}
+        # the number of nodes found by the last search, and the most events to one of them
+        self.explored = 0
+        self.diameter = 0
+        # the most nodes a search explores, or None for no bound
+        self.budget = budget
+
+    def events(self, CS):
+        if CS not in self.sets:
+            names = frozenset([label(e) for e in CS])
+            self.sets[CS] = names, self.mask(names)
+        return self.sets[CS]
+
+    def mask(self, names):
+        m = 0
+        for e in names:
+            m |= self.bits.get(e, 0)
+        return m
+
+    # the observations of a state and the states after each of its events
+    def initials(self, P):
+        if P not in self.table:
+            if not hasattr(self, 'initials_' + P.kind):
+                raise ValueError(P.kind + " is not supported by this semantics")
+            self.table[P] = getattr(self, 'initials_' + P.kind)(*P.args)
+        return self.table[P]
+
+    # the states after an event
+    def after(self, P, e):
+        return self.initials(P)[1].get(e, frozenset())
+
+    # the refusals of the stable observations; a terminated process refuses everything
+    def refusals(self, obs):
+        return set([self.alphabet if o == 'done' else o for o in obs if not divergent(o)])
+
+    # the refusal of any observation, as Par combines them
+    def refusal(self, o):
+        if o == 'done':
+            return self.alphabet
+        if divergent(o):
+            return o[1]
+        return o
+
+    def show(self, r):
+        return [e for e in self.order if r & self.bits[e]]
+
+    ############################################
+    # the combinators
+    ############################################
+
+    # IDiv leaves ok and wait open: it diverges, deadlocks or terminates
+    def initials_Chaos(self):
+        return frozenset([('div', self.alphabet), self.alphabet, 'done']), {}
+
+    def initials_Miracle(self):
+        return frozenset(), {}
+
+    def initials_Stop(self):
+        return frozenset([self.alphabet]), {}
+
+    def initials_Skip(self):
+        return frozenset(['done']), {}
+
+    def initials_SP(self, a):
+        return frozenset([self.alphabet & ~self.bits.get(label(a), 0)]), {label(a): frozenset([term.Skip])}
+
+    # Q starts when P terminates
+    def initials_Seq(self, P, Q):
+        obs, moves = self.initials(P)
+        moves = dict([(e, frozenset([seq(P1, Q) for P1 in ps])) for e, ps in moves.items()])
+        if 'done' in obs:
+            obsQ, movesQ = self.initials(Q)
+            obs = (obs - set(['done'])) | obsQ
+            moves = merge(moves, movesQ)
+        return obs, moves
+
+    # waiting for both before any event, otherwise one of them
+    def initials_EC(self, P, Q):
+        obsP, movesP = self.initials(P)
+        obsQ, movesQ = self.initials(Q)
+        obs = set([o for o in obsP | obsQ if not isinstance(o, int)])
+        for r1 in obsP:
+            for r2 in obsQ:
+                if isinstance(r1, int) and isinstance(r2, int):
+                    obs.add(r1 & r2)
+        return frozenset(obs), merge(movesP, movesQ)
+
+    def initials_IC(self, P, Q):
+        obsP, movesP = self.initials(P)
+        obsQ, movesQ = self.initials(Q)
+        return obsP | obsQ, merge(movesP, movesQ)
+
+    # the events of CS are synchronised; a terminated process refuses everything
+    def initials_Par(self, CS, P, Q):
+        A, mask = self.events(CS)
+        obsP, movesP = self.initials(P)
+        obsQ, movesQ = self.initials(Q)
+        obs = set()
+        for o1 in obsP:
+            for o2 in obsQ:
+                r1, r2 = self.refusal(o1), self.refusal(o2)
+                r = ((r1 | r2) & mask) | (r1 & r2 & ~mask)
+                if divergent(o1) or divergent(o2):
+                    obs.add(('div', r))
+                elif o1 == 'done' and o2 == 'done':
+                    obs.add('done')
+                else:
+                    obs.add(r)
+        moves = {}
+        for e, ps in movesP.items():
+            if e not in A:
+                moves[e] = frozenset([self.par(CS, P1, Q) for P1 in ps])
+            elif e in movesQ:
+                moves[e] = frozenset([self.par(CS, P1, Q1) for P1 in ps for Q1 in movesQ[e]])
+        for e, qs in movesQ.items():
+            if e not in A:
+                moves[e] = moves.get(e, frozenset()) | frozenset([self.par(CS, P, Q1) for Q1 in qs])
+        return frozenset(obs), moves
+
+    # the states of a parallel composition, memoised as mk() keys all the events of the interface
+    def par(self, CS, P, Q):
+        k = (CS, P, Q)
+        if k not in self.parallel:
+            self.parallel[k] = term.Par(CS, P, Q)
+        return self.parallel[k]
+
+    # the states of P after the hidden events; they are stable if they refuse all of them,
+    # and a cycle of hidden events is a divergence
+    def initials_Hide(self, P, CS):
+        A, mask = self.events(CS)
+        obs = set()
+        moves = {}
+        # depth first with the states on the current path, to find the cycles
+        seen = set([P])
+        path = set([P])
+        stack = [(P, iter(self.hidden(P, A)))]
+        while stack:
+            R, successors = stack[-1]
+            S = next(successors, None)
+            if S is None:
+                stack.pop()
+                path.discard(R)
+                obsR, movesR = self.initials(R)
+                obs |= set([o for o in obsR if self.refusal(o) & mask == mask])
+                for e, rs in movesR.items():
+                    if e not in A:
+                        moves[e] = moves.get(e, frozenset()) | frozenset([term.Hide(R1, CS) for R1 in rs])
+            elif S in path:
+                obs.add(('div', self.alphabet))
+            elif S not in seen:
+                seen.add(S)
+                path.add(S)
+                stack.append((S, iter(self.hidden(S, A))))
+        return frozenset(obs), moves
+
+    def hidden(self, P, A):
+        return [P1 for e, ps in self.initials(P)[1].items() if e in A for P1 in ps]
+
+    def initials_Rec(self, name, equations, round):
+        P = term.Rec(name, dict(equations), round)
+        if P in self.unfolding:
+            raise ValueError("unguarded recursion " + name)
+        self.unfolding.add(P)
+        try:
+            return self.initials(unfold(P))
+        finally:
+            self.unfolding.discard(P)
+
+    def initials_Var(self, name):
+        raise ValueError("unbound variable " + name)
+
+    ############################################
+    # the search
+    ############################################
+
+    # breadth first from a node to the first one with a violation, or None;
+    # check(node) gives the violation and successors(node) the pairs of an event and a node
+    def search(self, start, check, successors):
+        parent = {start: None}
+        depth = {start: 0}
+        todo = deque([start])
+        while todo:
+            node = todo.popleft()
+            violation = check(node)
+            if violation is not None:
+                self.explored = len(parent)
+                self.diameter = depth[node]
+                trace = []
+                while parent[node] is not None:
+                    node, e = parent[node]
+                    trace.append(e)
+                return list(reversed(trace)), violation
+            for e, N in successors(node):
+                if N not in parent:
+                    if self.budget is not None and len(parent) >= self.budget:
+                        raise Exhausted("more than %d states, the recursion may grow the term" % self.budget)
+                    parent[N] = (node, e)
+                    depth[N] = depth[node] + 1
+                    todo.append(N)
+        self.explored = len(parent)
+        self.diameter = max(depth.values())
+        return None
+
+    def moves(self, P):
+        return [(e, P1) for e, ps in self.initials(P)[1].items() for P1 in ps]
+
+
+def divergent(o):
+    return isinstance(o, tuple)
+
+def diverges(obs):
+    return any([divergent(o) for o in obs])
+
+# Skip;Q is Q, so the states of a sequence do not keep the finished prefixes
+def seq(P, Q):
+    if P is term.Skip:
+        return Q
+    return term.Seq(P, Q)
+
+# the union of the moves of two states
+def merge(m1, m2):
+    moves = dict(m1)
+    for e, ps in m2.items():
+        moves[e] = moves.get(e, frozenset()) | ps
+    return moves
+
+
+########################################
+## the normal form of a specification
+########################################
+
+# the deterministic automaton of a specification: a node is the set of the states it may
+# be in after a trace, by the subset construction from its initial state. Each node is
+# annotated once with whether it has a stable observation, the acceptances of them, i.e.,
+# the complements of the refusals, and whether it diverges, so a refinement is one pass
+# over the pairs of a state of the implementation and a node. The refusals of this
+# semantics are maximal and compared as they are, so a node keeps the acceptances of all
+# its states; with closed, as the failures of standard CSP, a refusal only needs to be
+# included in one of the specification, so a node keeps the minimal acceptances only,
+# an antichain. A transition of a node is found when a check
+# first takes it, so the parts of a large specification the implementation never gets to
+# are not normalised; with prune, neither are the nodes after a divergence, as FDRef
+# allows anything there
+class Normal:
+    def __init__(self, Q, alphabet=None, prune=False, closed=False, lts=None):
+        if lts is None:
+            lts = LTS(alphabet)
+        self.lts = lts
+        self.prune = prune
+        self.closed = closed
+        # the nodes by their sets of states, and their annotations and transitions by number
+        self.index = {}
+        self.stable = []
+        self.acceptances = []
+        self.divergent = []
+        self.after = []
+        self.states = []
+        self.moves = []
+        # the node of no state, after the events the specification cannot do
+        self.empty = self.node(frozenset())
+        self.start = self.node(frozenset([Q]))
+
+    def node(self, qs):
+        if qs not in self.index:
+            obs = set()
+            for Q in qs:
+                obs |= self.lts.initials(Q)[0]
+            refusals = self.lts.refusals(obs)
+            self.index[qs] = len(self.after)
+            self.stable.append(len(refusals) > 0)
+            acceptances = [self.lts.alphabet & ~r for r in refusals]
+            if self.closed:
+                acceptances = antichain(acceptances)
+            self.acceptances.append(frozenset(acceptances))
+            self.divergent.append(diverges(obs))
+            self.after.append({})
+            self.states.append(qs)
+            self.moves.append(None)
+        return self.index[qs]
+
+    # the node after an event of a node
+    def step(self, n, e):
+        after = self.after[n]
+        if e not in after:
+            if self.moves[n] is None:
+                self.moves[n] = {}
+                if not (self.prune and self.divergent[n]):
+                    for Q in self.states[n]:
+                        self.moves[n] = merge(self.moves[n], self.lts.initials(Q)[1])
+            after[e] = self.node(self.moves[n].get(e, frozenset()))
+        return after[e]
+
+    # the refusals of a state of the implementation which are not ones of a node; with
+    # closed, the maximal ones not included in a refusal of the node
+    def missing(self, P, n):
+        refusals = self.lts.refusals(self.lts.initials(P)[0])
+        if not self.closed:
+            return [r for r in refusals if self.lts.alphabet & ~r not in self.acceptances[n]]
+        acceptances = antichain([self.lts.alphabet & ~r for r in refusals])
+        return [self.lts.alphabet & ~a for a in acceptances if not any([b & ~a == 0 for b in self.acceptances[n]])]
+
+    # the pairs after the events of a state of the implementation
+    def successors(self, node):
+        P, n = node
+        return [(e, (P1, self.step(n, e))) for e, P1 in self.lts.moves(P)]
+
+
+# the minimal sets of some bit masks
+def antichain(sets):
+    return [a for a in sets if not any([b != a and b & ~a == 0 for b in sets])]
+
+# the normal form of a specification, or the one given, e.g., to check several implementations;
+# closed is None for the checks without refusals
+def normal_form(Q, alphabet, prune, closed):
+    if isinstance(Q, Normal):
+        if Q.prune and not prune:
+            raise ValueError("the normal form is pruned after divergences, so only for FDRef")
+        if closed is not None and Q.closed != closed:
+            raise ValueError("the normal form is for the refusals with closed=%s" % Q.closed)
+        return Q
+    return Normal(Q, alphabet, prune, closed == True)
+
+
+########################################
+## the checks, as the ones of csp.py
+########################################
+
+# deadlock free; a divergence may be waiting with the full refusal too, as Chaos is
+def DLF(P, alphabet=None, lts=None):
+    if lts is None:
+        lts = LTS(alphabet)
+    result = Result('DLF', None)
+    def check(R):
+        if any([o != 'done' and lts.refusal(o) == lts.alphabet for o in lts.initials(R)[0]]):
+            return True
+    found = lts.search(P, check, lts.moves)
+    if found is None:
+        return result.done('deadlock free', "Deadlock Free!!!")
+    result.trace, result.refusal = found[0], lts.show(lts.alphabet)
+    report(result.trace)
+    return result.done('deadlock', "Deadlock!!!")
+
+# divergence free
+def DVF(P, alphabet=None, lts=None):
+    if lts is None:
+        lts = LTS(alphabet)
+    result = Result('DVF', None)
+    found = lts.search(P, lambda R: True if diverges(lts.initials(R)[0]) else None, lts.moves)
+    if found is None:
+        return result.done('divergence free', "Divergent Free!!!")
+    result.trace = found[0]
+    report(result.trace)
+    return result.done('divergent', "Divergent!!!")
+
+# a stable trace of P which is not one of Q
+def TRef(P, Q, alphabet=None):
+    normal = normal_form(Q, alphabet, False, None)
+    lts = normal.lts
+    result = Result('TRef', None)
+    def check(node):
+        if lts.refusals(lts.initials(node[0])[0]) and not normal.stable[node[1]]:
+            return True
+    found = lts.search((P, normal.start), check, normal.successors)
+    if found is None:
+        return result.done('refined', "Refined!!!")
+    result.trace = found[0]
+    report(result.trace)
+    return result.done('not refined', "No refinement")
+
+# a stable trace and refusal of P which is not one of Q; with closed, the refusals are
+# compared as in standard CSP, see Normal
+def SFRef(P, Q, alphabet=None, closed=False):
+    normal = normal_form(Q, alphabet, False, closed)
+    lts = normal.lts
+    result = Result('SFRef', None)
+    def check(node):
+        missing = normal.missing(*node)
+        if missing:
+            return min([lts.show(r) for r in missing])
+    found = lts.search((P, normal.start), check, normal.successors)
+    if found is None:
+        return result.done('refined', "Refined!!!")
+    result.trace, result.refusal = found
+    report(result.trace, result.refusal)
+    return result.done('not refined', "No refinement")
+
+# failures and divergences: anything is allowed after Q diverges
+def FDRef(P, Q, alphabet=None, closed=False):
+    normal = normal_form(Q, alphabet, True, closed)
+    lts = normal.lts
+    result = Result('FDRef', None)
+    def check(node):
+        if normal.divergent[node[1]]:
+            return None
+        if diverges(lts.initials(node[0])[0]):
+            return 'div'
+        missing = normal.missing(*node)
+        if missing:
+            return min([lts.show(r) for r in missing])
+    def successors(node):
+        if normal.divergent[node[1]]:
+            return []
+        return normal.successors(node)
+    found = lts.search((P, normal.start), check, successors)
+    if found is None:
+        return result.done('refined', "Refined!!!")
+    result.trace = found[0]
+    if found[1] != 'div':
+        result.refusal = found[1]
+    report(result.trace, found[1])
+    return result.done('not refined', "No refinement")
+
+
+# the verdicts of a check by this semantics and by the Z3 one of csp.py, e.g., compare('SFRef', P, Q)
+def compare(check, *terms, **options):
+    explicit = globals()[check](*terms, **options)
+    with CheckContext():
+        symbolic = getattr(csp, check)(*[encode(P) for P in terms], **options)
+    return explicit.verdict, symbolic.verdict
+
+
+########################################
+## proofs for all depths of the recursion
+########################################
+
+# a check by the explicit search, and the LTS of its states, e.g., for their diameter
+def explore(check, terms, alphabet=None, closed=False, budget=None):
+    lts = LTS(alphabet, budget)
+    if check in ('DLF', 'DVF'):
+        return globals()[check](terms[0], alphabet, lts), lts
+    if check in ('TRef', 'SFRef', 'FDRef'):
+        normal = Normal(terms[1], alphabet, check == 'FDRef', closed, lts)
+        options = {} if check == 'TRef' else {'closed': closed}
+        return globals()[check](terms[0], normal, alphabet, **options), lts
+    raise ValueError("no explicit search for the check " + str(check))
+
+# a check for the recursion without a bound, e.g., Prove('DLF', P) for a RecP P or a term, by
+# an explicit search of the states of the check up to their fixed point: each state is explored
+# once, so when no new one is found, every path is one through the states found, and the verdict
+# holds for all depths of the recursion. The states must be finite, i.e., no recursion grows the
+# term, e.g., through Seq(Var('X'), P); the verdict is 'unknown' when the search explores more
+# than budget states. With confirm, the states within the diameter, the most events to one of
+# them, are checked by the Z3 semantics too, with the recursion unfolded over that many events
+def Prove(check, *ps, alphabet=None, closed=False, confirm=True, budget=100000):
+    terms = [of_recp(P, False) if isinstance(P, csp.RecP) else P for P in ps]
+    try:
+        result, lts = explore(check, terms, alphabet, closed, budget)
+    except Exhausted as e:
+        return Result(check, None).done('unknown', "No fixed point: " + str(e))
+    if result.trace is not None or not confirm:
+        return result
+
+    depth = guard_depth(terms)
+    if depth == 0:
+        report("The recursion is unguarded, no confirmation by the Z3 semantics")
+        return result
+    rounds = 1 if depth == infinity else lts.diameter // depth + 1
+    options = {'closed': closed} if check in ('SFRef', 'FDRef') else {}
+    with CheckContext():
+        symbolic = getattr(csp, check)(*[encode(at_round(P, rounds)) for P in terms], **options)
+    if symbolic.verdict == 'unknown':
+        report("The diameter is unknown by the Z3 semantics")
+    elif symbolic.trace is not None and len(symbolic.trace) < rounds * depth:
+        # the semantics disagree within the diameter
+        return result.done('unknown', "Z3 finds the counterexample " + str(symbolic.trace))
+    elif symbolic.trace is not None:
+        # one of the truncation by Skip, which may hide one within the diameter
+        report("The diameter is open: Z3 stops at " + str(symbolic.trace))
+    else:
+        report("Confirmed for the diameter of %d events in %d rounds" % (lts.diameter, rounds))
+    return result
@@ -0,0 +1,75 @@
+##########################################################
+## Models of their own alphabets
+## A model is a copy of csp.py over the events of its own
+## alphabet instead of those of event.py: plain events, or
+## channels whose events are the products of the values of
+## their fields, e.g., pickup.i.j as in the philosophers.
+## Its Event, List and Variables sorts, set operations and
+## operators are those of the copies of event.py, list.py
+## and csp.py loaded for it, so a warm interpreter checks
+## one model after another without restarting, and the
+## default csp module is left as it is.
+##
+## m = Alphabet('phil', channels=[('pickup', [range(3), range(3)]),
+##                                ('putdown', [range(3), range(3)])])
+## P = m.Seq(m.SP(m.pickup(0, 0)), m.SP(m.putdown(0, 0)))
+## m.DLF(P)
+##
+## m = Alphabet('ab', ['a', 'b'])
+## m.TRef(m.SP(m.a), m.EC(m.SP(m.a), m.SP(m.b)))
+##
+## The processes of a model are only combined by the
+## operators of the same model.
+##########################################################
+
+import importlib
+import itertools
+import sys
+import types
+from z3 import Datatype, IntSort
+import finite_set
+import init
+
+
+# the modules loaded afresh for each model
+model_modules = ['event', 'list', 'list_bounded', 'list_seq', 'csp']
+
+# the module in place of event.py for an alphabet: the sort Event, whose plain events
+# are constants and whose channels are constructors of their fields, and its sets
+def event_module(name, events, channels):
+    module = types.ModuleType('event_' + name)
+    module.__dict__.update(vars(finite_set))
+    Event = Datatype('Event_' + name)
+    for e in events:
+        Event.declare(e)
+    for channel, domains in channels:
+        Event.declare(channel, *[('%s_%d' % (channel, i), IntSort()) for i in range(len(domains))])
+    Event = Event.create()
+
+    alphabet = [getattr(Event, e) for e in events]
+    for channel, domains in channels:
+        alphabet += [getattr(Event, channel)(*values) for values in itertools.product(*domains)]
+    for e in list(events) + [channel for channel, domains in channels]:
+        setattr(module, e, getattr(Event, e))
+    module.Event = Event
+    module.SetSort = finite_set.FSetSort(alphabet)
+    module.Set = finite_set.FSetDecl(alphabet)
+    module.Fullset = module.Set.fullset()
+    return module
+
+# the sorts, sets, operators and checks of csp.py over an alphabet of plain events, a list
+# of their names, and channels, a list of their names with the domains of their fields
+def Alphabet(name, events=(), channels=()):
+    if len(events) + len(channels) == 0:
+        raise ValueError("the alphabet of the model " + name + " is empty")
+    saved = dict([(m, sys.modules.pop(m)) for m in model_modules if m in sys.modules])
+    init.model_name = '_' + name
+    try:
+        sys.modules['event'] = event_module(name, events, channels)
+        model = importlib.import_module('csp')
+    finally:
+        init.model_name = ''
+        for m in model_modules:
+            sys.modules.pop(m, None)
+        sys.modules.update(saved)
+    return model
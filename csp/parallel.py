@@ -0,0 +1,179 @@
+##########################################################
+## Parallel enumeration of traces
+## The traces are split by their first events: the traces
+## shorter than depth are partitions of their own and the
+## others are partitioned by their prefix of depth events of
+## Set.alphabet. Each partition is enumerated by a worker
+## process with its own Z3 context, which imports csp with the
+## trace encoding of the caller and encodes the processes from
+## their terms, see term.py, which are pickled for it. The
+## merged results are the behaviours of the sequential checks,
+## in the order of the partitions. Each worker starts by
+## importing z3 and csp, about a second, so only listings
+## much longer than that gain from more cores; on one core
+## a listing of 0.6s took 3.2s with two workers.
+##
+## if __name__ == '__main__':
+##     P = term.Par([b], term.Seq(term.SP(a), term.SP(b)), term.SP(b))
+##     r = ParallelListAllTracesAndRefs(P, depth=2, processes=32)
+##
+## The workers are spawned, so a script calling these must
+## guard its checks by __name__ == '__main__'.
+##########################################################
+
+import itertools
+import multiprocessing
+import sys
+import timeit
+import init
+from results import *
+
+
+# the partitions of the traces up to depth events: the words shorter than depth,
+# whose trace is exactly the word, and the words of depth events, which are prefixes
+def partitions(depth):
+    import csp
+    names = [csp.EventToString(e) for e in csp.Set.alphabet]
+    parts = []
+    for n in range(depth + 1):
+        for word in itertools.product(names, repeat=n):
+            parts.append((list(word), n < depth))
+    return parts
+
+# the processes of a check as terms; the workers cannot rebuild the other processes, e.g.,
+# the ones of the models of model.py or of csp_local
+def terms_of(ps):
+    import term
+    for P in ps:
+        if not isinstance(P, term.Term):
+            raise ValueError("the workers encode the processes from their terms of term.py, not " + repr(P))
+    return list(ps)
+
+
+############################################
+# the workers
+############################################
+
+# the modules which read the trace encoding when they are imported
+encoding_modules = ['list', 'list_bounded', 'list_seq', 'csp', 'term']
+
+# import csp in a worker with the trace encoding of the caller. A spawned worker imports the
+# main module of the caller again, which may have imported csp under another encoding, e.g.,
+# the one of the caller for a configuration of portfolio.py; the worker then imports csp and
+# term afresh, with a list sort of its own name as the copies of model.py
+def setup(encoding, bound):
+    init.trace_encoding = encoding
+    init.trace_bound = bound
+    loaded = sys.modules.get('csp')
+    if loaded is None or (loaded.trace_encoding, loaded.trace_bound) == (encoding, bound):
+        import csp
+        return
+    for m in encoding_modules:
+        sys.modules.pop(m, None)
+    init.model_name = '_' + encoding
+    try:
+        import csp, term
+    finally:
+        init.model_name = ''
+
+# the constraint on the trace of fv of a partition
+def within(word, exact):
+    import csp
+    events = dict([(csp.EventToString(e), e) for e in csp.Set.alphabet])
+    w = csp.nil
+    for name in reversed(word):
+        w = csp.cons(events[name], w)
+    if exact:
+        return csp.tr(csp.fv) == w
+    return csp.prefix(w, csp.tr(csp.fv))
+
+# the behaviours of a partition: the stable traces, or failures if refusals is set, and the
+# divergent traces, with the number of solver calls
+def enumerate_part(task):
+    import csp, term
+    T, refusals, word, exact = task
+    with csp.CheckContext() as ctx:
+        P = term.encode(T)
+        part = within(word, exact)
+        stable = []
+        for t, r in csp.observations(P, csp.And(csp.ok(csp.fv), part), refusals, ['prefix']):
+            if refusals:
+                stable.append([csp.trace_of(t), csp.refusal_of(r)])
+            else:
+                stable.append(csp.trace_of(t))
+        divergent = [csp.trace_of(t) for t, r in csp.observations(P, csp.And(csp.Not(csp.ok(csp.fv)), part), False, ['prefix'])]
+        return stable, divergent, ctx.solver.calls
+
+# the first stable trace of P in a partition which is not a trace of Q, or None
+def refine_part(task):
+    import csp, term
+    ts, word, exact = task
+    with csp.CheckContext() as ctx:
+        P, Q = [term.encode(T) for T in ts]
+        s = ctx.solver
+        for t, r in csp.observations(P, csp.And(csp.ok(csp.fv), within(word, exact)), False, ['prefix']):
+            s.push()
+            s.add(ctx.cone([Q]))
+            s.add(csp.And(Q.relation(Q.iv, Q.fv), Q.iv == csp.init, csp.ok(Q.fv), csp.tr(Q.fv) == t))
+            found = s.check() == csp.sat
+            s.pop()
+            if not found:
+                return csp.trace_of(t), ctx.solver.calls
+        return None, ctx.solver.calls
+
+def pool(processes):
+    return multiprocessing.get_context('spawn').Pool(processes, setup, (init.trace_encoding, init.trace_bound))
+
+
+############################################
+# the checks
+############################################
+
+def parallel_listing(check, P, refusals, depth, processes):
+    result = Result(check, None)
+    T, = terms_of([P])
+    tasks = [(T, refusals, word, exact) for word, exact in partitions(depth)]
+    calls = 0
+    with pool(processes) as workers:
+        for stable, divergent, n in workers.imap(enumerate_part, tasks):
+            result.stable.extend(stable)
+            result.divergent.extend(divergent)
+            calls += n
+    report("Stable:")
+    for t in result.stable:
+        report(t)
+    report("Divergent:")
+    for t in result.divergent:
+        report(t)
+    result.done('done', "Done")
+    result.calls = calls
+    return result
+
+# ListAllTraces of a term with the partitions of depth events enumerated by processes workers
+def ParallelListAllTraces(P, depth=1, processes=None):
+    return parallel_listing('ListAllTraces', P, False, depth, processes)
+
+# ListAllTracesAndRefs of a term with the partitions of depth events enumerated by processes workers
+def ParallelListAllTracesAndRefs(P, depth=1, processes=None):
+    return parallel_listing('ListAllTracesAndRefs', P, True, depth, processes)
+
+# TRef of two terms with the traces of P partitioned; the counterexample is the one of the first
+# partition in order which has one, and the other workers are stopped then
+def ParallelTRef(P, Q, depth=1, processes=None):
+    result = Result('TRef', None)
+    ts = terms_of([P, Q])
+    tasks = [(ts, word, exact) for word, exact in partitions(depth)]
+    calls = 0
+    with pool(processes) as workers:
+        for t, n in workers.imap(refine_part, tasks):
+            calls += n
+            if t is not None:
+                result.trace = t
+                report(t)
+                break
+    if result.trace is not None:
+        result.done('not refined', "No refinement")
+    else:
+        result.done('refined', "Refined!!!")
+    result.calls = calls
+    return result
@@ -0,0 +1,172 @@
+##########################################################
+## Portfolio solving
+## The same check runs under several solver configurations,
+## one worker process each, and the first definitive verdict
+## wins: the other workers are stopped. A configuration is
+## a trace encoding, see list.py, and the Z3 parameters of
+## the solver, e.g., E-matching without MBQI or another
+## random seed. The winner of each check is recorded, in
+## memory or in a JSON file, and tried first by later runs.
+## The processes are terms, see term.py, which each worker
+## encodes under its configuration. A worker which crashes,
+## e.g., in z3, counts as one without a verdict.
+##
+## if __name__ == '__main__':
+##     P = term.Par([b], term.Seq(term.SP(a), term.SP(b)), term.SP(b))
+##     r = Portfolio('DLF', P, record='portfolio.json')
+##     print(r.verdict, r.config)
+##
+## The bounded and seq encodings only cover the traces of
+## at most trace_bound events, so a deadlock, a divergence
+## or a missing behaviour they find is one, but a verdict
+## of deadlock free, divergence free or refined does not
+## win: it is the result only if no other configuration
+## has a verdict, with its bound. The workers are spawned,
+## so a script calling Portfolio must guard its checks by
+## __name__ == '__main__'.
+##########################################################
+
+import json
+import os
+import multiprocessing
+import pickle
+import queue
+import timeit
+import init
+from z3 import set_param
+from results import *
+from parallel import setup, terms_of
+
+
+configurations = [
+    {'name': 'list', 'encoding': 'list', 'params': {}},
+    {'name': 'list-ematching', 'encoding': 'list', 'params': {'smt.mbqi': False}},
+    {'name': 'list-seed-1', 'encoding': 'list', 'params': {'smt.random_seed': 1}},
+    {'name': 'bounded', 'encoding': 'bounded', 'params': {}},
+]
+
+# the seq encoding only with a z3 whose sequence solver handles it, see init.py
+if init.seq_supported():
+    configurations.append({'name': 'seq', 'encoding': 'seq', 'params': {}})
+
+checks = ['DLF', 'DVF', 'TRef', 'SFRef', 'FDRef']
+
+# the encodings of the traces of at most trace_bound events, see list.py
+bounded_encodings = ['bounded', 'seq']
+
+# the verdicts which need every trace, rather than a counterexample
+positive = ['deadlock free', 'divergence free', 'refined']
+
+# the configuration which won each check, by the name of the check
+winners = {}
+
+# the seconds between the looks at the workers, for the ones which died without an answer
+poll = 0.5
+
+def load_winners(record):
+    if record is not None and os.path.exists(record):
+        with open(record) as f:
+            winners.update(json.load(f))
+
+def save_winners(record):
+    if record is not None:
+        with open(record, 'w') as f:
+            json.dump(winners, f, indent=1, sort_keys=True)
+
+# the configurations with the last winner of the check first
+def ordered(check, configs):
+    winner = winners.get(check)
+    return sorted(configs, key=lambda config: config['name'] != winner)
+
+
+# a worker: the check of the processes encoded from their terms under a configuration;
+# the result is put into the queue, None if the check failed. The terms come pickled and
+# are only read once csp is imported with the encoding of the configuration
+def race(index, config, check, pickled, results):
+    try:
+        setup(config['encoding'], config['bound'])
+        for name, value in config.get('params', {}).items():
+            set_param(name, value)
+        import csp, term
+        with csp.CheckContext():
+            ps = [term.encode(T) for T in pickle.loads(pickled)]
+            results.put((index, getattr(csp, check)(*ps).to_dict()))
+    except Exception:
+        results.put((index, None))
+
+# the bound on the traces of a configuration, None if its encoding covers every trace
+def bound_of(config):
+    if config['encoding'] in bounded_encodings:
+        return config['bound']
+    return None
+
+# run a check of csp.py, e.g., Portfolio('FDRef', P, Q), under the configurations in parallel and
+# return the first result whose verdict is not unknown, nor a positive one of a bounded encoding;
+# if no configuration has one within timeout seconds, the first positive verdict of a bounded
+# encoding with its bound, or an unknown one
+def Portfolio(check, *ps, configs=None, record=None, timeout=None):
+    if check not in checks:
+        raise ValueError("no portfolio for the check " + str(check))
+    load_winners(record)
+    configs = ordered(check, configurations if configs is None else configs)
+    # the encoding and the bound of the caller for the configurations without their own, as
+    # the spawned workers do not see the ones the caller set in init
+    configs = [dict({'encoding': init.trace_encoding, 'bound': init.trace_bound}, **config) for config in configs]
+    result = Result(check, None)
+
+    mp = multiprocessing.get_context('spawn')
+    results = mp.Queue()
+    pickled = pickle.dumps(terms_of(ps))
+    workers = [mp.Process(target=race, args=(i, config, check, pickled, results))
+               for i, config in enumerate(configs)]
+    for w in workers:
+        w.start()
+    deadline = None if timeout is None else result.started[1] + timeout
+    # the workers which answered; the others which exited died without an answer
+    answered = set()
+    # the first positive verdict of a bounded encoding, with its configuration
+    bounded = None
+    try:
+        while len(answered) < len(workers):
+            left = None if deadline is None else deadline - timeit.default_timer()
+            if left is not None and left <= 0:
+                break
+            try:
+                index, found = results.get(timeout=poll if left is None else min(poll, left))
+            except queue.Empty:
+                dead = [w for i, w in enumerate(workers) if i not in answered and w.exitcode is not None]
+                if len(answered) + len(dead) == len(workers) and results.empty():
+                    break
+                continue
+            answered.add(index)
+            if found is None or found['verdict'] == 'unknown':
+                continue
+            if found['verdict'] in positive and bound_of(configs[index]) is not None:
+                if bounded is None:
+                    bounded = (index, found)
+                continue
+            winners[check] = configs[index]['name']
+            save_winners(record)
+            return chosen(result, configs[index], found)
+    finally:
+        for w in workers:
+            if w.is_alive():
+                w.terminate()
+            w.join()
+    if bounded is not None:
+        return chosen(result, configs[bounded[0]], bounded[1])
+    return result.done('unknown', "No configuration found a verdict")
+
+# the result of the verdict found under a configuration, with the bound of its traces
+def chosen(result, config, found):
+    for f in ['trace', 'refusal', 'stable', 'divergent']:
+        setattr(result, f, found[f])
+    result.config = config['name']
+    message = result.config + ": " + found['verdict']
+    if found['verdict'] in positive:
+        result.bound = bound_of(config)
+    if result.bound is not None:
+        message += " for traces of at most %d events" % result.bound
+    result.done(found['verdict'], message)
+    result.calls = found['calls']
+    return result
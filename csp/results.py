@@ -0,0 +1,90 @@
+##########################################################
+## Results of the checks
+## A check returns a Result: its verdict, the counterexample
+## trace and refusal if there is one, the behaviours a listing
+## found, the number of solver calls and the wall time.
+## Nothing is printed unless a reporter is set, e.g.,
+##
+## set_reporter(console)
+## r = SFRef(P, Q)
+## print(r.to_json())
+##########################################################
+
+import json
+import timeit
+
+# called with the behaviours and the verdicts as the checks find them
+reporter = None
+
+def set_reporter(r):
+    global reporter
+    reporter = r
+
+def report(*args):
+    if reporter is not None:
+        reporter(*args)
+
+# the reporter printing the same lines as the checks always did
+def console(*args):
+    print(*args)
+
+
+class Result:
+    fields = ['check', 'verdict', 'trace', 'refusal', 'stable', 'divergent', 'calls', 'time', 'config', 'bound']
+
+    def __init__(self, check, solver):
+        self.check = check
+        self.verdict = None
+        # the counterexample, as the names of the events
+        self.trace = None
+        self.refusal = None
+        # the behaviours a listing found
+        self.stable = []
+        self.divergent = []
+        self.calls = 0
+        self.time = 0.0
+        # the name of the solver configuration which found the verdict, see portfolio.py
+        self.config = None
+        # the most events of the traces the verdict holds for, if they are bounded, see portfolio.py
+        self.bound = None
+        # None for the checks without a solver, e.g., of lts.py
+        self.solver = solver
+        self.started = (self.solver_calls(), timeit.default_timer())
+
+    def solver_calls(self):
+        if self.solver is None:
+            return 0
+        return self.solver.calls
+
+    # record the verdict and the solver calls and time since the check started
+    def done(self, verdict, message=None):
+        self.verdict = verdict
+        self.calls = self.solver_calls() - self.started[0]
+        self.time = timeit.default_timer() - self.started[1]
+        if message is not None:
+            report(message)
+        return self
+
+    def to_dict(self):
+        return dict([(f, getattr(self, f)) for f in Result.fields])
+
+    def to_json(self):
+        return json.dumps(self.to_dict())
+
+    # the result of a dictionary of to_dict, e.g., of another process or of cache.py
+    @staticmethod
+    def from_dict(d):
+        result = Result(d['check'], None)
+        for f in Result.fields:
+            setattr(result, f, d.get(f, getattr(result, f)))
+        return result
+
+    def __repr__(self):
+        s = "%s: %s (%d calls, %.3fs)" % (self.check, self.verdict, self.calls, self.time)
+        if self.trace is not None:
+            s += " trace " + str(self.trace)
+        if self.refusal is not None:
+            s += " refusal " + str(self.refusal)
+        if self.bound is not None:
+            s += " for traces of at most %d events" % self.bound
+        return s
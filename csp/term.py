@@ -0,0 +1,362 @@
+##########################################################
+## Structural process terms
+## A term is an immutable node, e.g., Seq(SP(a), SP(b)), and
+## structurally equal terms are the same object (hash-consing).
+## The Z3 encoding of a term is generated on demand by encode():
+## the processes without sub-processes (Skip, SP(a), ...) are
+## defined once and all their occurrences share the relation and
+## its definition. A process of the other terms is one
+## observation of the term, so the occurrences of a term which
+## no observation needs together share one process, its relation
+## and its axioms, e.g., the ones in the branches of a choice
+## after their first events. The occurrences an observation may
+## need together, e.g., in both operands of Par or Seq, are
+## distinct processes.
+##
+## P = Seq(SP(a), EC(SP(b), SP(a)))
+## DLF(encode(P))
+##########################################################
+
+from csp import *
+import csp
+
+
+class Term:
+    __slots__ = ('kind', 'args')
+
+    def __init__(self, kind, args):
+        self.kind = kind
+        self.args = args
+
+    # the same string as the expr of its process
+    def __repr__(self):
+        if self.args == ():
+            return self.kind
+        return self.kind + "(" + ",".join([show(a) for a in self.args]) + ")"
+
+    # a term is pickled by its kind and arguments, the events by their names, so a worker
+    # process, e.g., of parallel.py, hash-conses the same term in its own table
+    def __reduce__(self):
+        return (unpickle, (self.kind, named(self.args)))
+
+def show(a):
+    if isinstance(a, tuple):
+        return str(list(a))
+    if isinstance(a, str):
+        return "'" + a + "'"
+    if is_expr(a):
+        return EventToString(a)
+    return str(a)
+
+
+# all terms created so far, indexed by their kind and arguments
+terms = {}
+
+# terms are compared by identity; z3 expressions by their ids as z3 hash-conses them too
+def key(a):
+    if isinstance(a, (Term, str)):
+        return a
+    if isinstance(a, tuple):
+        return tuple([key(x) for x in a])
+    if is_ast(a):
+        return ('ast', a.get_id())
+    return a
+
+def mk(kind, *args):
+    args = tuple([tuple(a) if isinstance(a, list) else a for a in args])
+    k = (kind, key(args))
+    if k not in terms:
+        terms[k] = Term(kind, args)
+    return terms[k]
+
+# an event of event.py in the arguments of a pickled term
+class EventName(str):
+    pass
+
+def named(a):
+    if isinstance(a, tuple):
+        return tuple([named(x) for x in a])
+    if is_expr(a):
+        return EventName(EventToString(a))
+    return a
+
+def unpickle(kind, args):
+    events = dict([(EventToString(e), e) for e in Set.alphabet])
+    def event(a):
+        if isinstance(a, tuple):
+            return tuple([event(x) for x in a])
+        if isinstance(a, EventName):
+            return events[a]
+        return a
+    return mk(kind, *event(args))
+
+
+############################################
+# the nodes
+############################################
+
+Chaos = mk('Chaos')
+Miracle = mk('Miracle')
+Stop = mk('Stop')
+Skip = mk('Skip')
+
+def SP(a):
+    return mk('SP', a)
+
+def Seq(P, Q):
+    return mk('Seq', P, Q)
+
+def EC(P, Q):
+    return mk('EC', P, Q)
+
+def IC(P, Q):
+    return mk('IC', P, Q)
+
+def Par(CS, P, Q):
+    return mk('Par', CS, P, Q)
+
+def Hide(P, CS):
+    return mk('Hide', P, CS)
+
+# a recursive process: the variable name of the equations, a dictionary from
+# the names to their bodies, and the number of rounds it is unfolded, e.g.,
+# Rec('X', {'X': Seq(SP(a), Var('X'))}, 3). The round None is the recursion
+# without a bound, which only the explicit semantics of lts.py supports
+def Rec(name, equations, round):
+    return mk('Rec', name, tuple(sorted(equations.items())), round)
+
+def Var(name):
+    return mk('Var', name)
+
+
+############################################
+# unfolding of recursion, as RecP does
+############################################
+
+# replace the variables by terms in a term
+def subst(P, mapping, done=None):
+    if done is None:
+        done = {}
+    if P in done:
+        return done[P]
+    if P.kind == 'Var':
+        R = mapping.get(P.args[0], P)
+    elif P.kind == 'Rec':
+        # the variables of an inner recursion are bound by it
+        inner = dict([(v, T) for v, T in mapping.items() if v not in dict(P.args[1])])
+        R = mk('Rec', P.args[0], tuple([(v, subst(B, inner)) for v, B in P.args[1]]), P.args[2])
+    else:
+        R = mk(P.kind, *[subst(a, mapping, done) if isinstance(a, Term) else a for a in P.args])
+    done[P] = R
+    return R
+
+# one round of the recursion: its body where each variable is the recursion of one round less;
+# the last round is Skip
+def unfold(P):
+    name, equations, round = P.args
+    if round == 0:
+        return Skip
+    if round is not None:
+        round = round - 1
+    mapping = dict([(v, mk('Rec', v, equations, round)) for v, B in equations])
+    return subst(dict(equations)[name], mapping)
+
+# the term of a recursion of csp.py, e.g., for X = RecP('Seq(SP(a),X)', 2) and X.setup(['X'], [X]),
+# of_recp(X) is Rec('X', {'X': Seq(SP(a), Var('X'))}, 2); of_recp(X, False) is without a bound
+def of_recp(R, bounded=True):
+    names = dict([(v, Var(v)) for v in R.vl])
+    equations = dict([(v, eval(Q.body, globals(), names)) for v, Q in zip(R.vl, R.pl)])
+    return Rec(R.vl[R.pl.index(R)], equations, R.round if bounded else None)
+
+
+############################################
+# lazy unfolding of recursion
+############################################
+
+# the term with every recursion unfolded round times
+def at_round(P, round, done=None):
+    if done is None:
+        done = {}
+    if P in done:
+        return done[P]
+    if P.kind == 'Rec':
+        R = mk('Rec', P.args[0], tuple([(v, at_round(B, round, done)) for v, B in P.args[1]]), round)
+    else:
+        R = mk(P.kind, *[at_round(a, round, done) if isinstance(a, Term) else a for a in P.args])
+    done[P] = R
+    return R
+
+infinity = float('inf')
+
+# the least numbers of visible events before a term reaches a variable and before it terminates;
+# a variable may terminate at once, and the counts are under the events of hidden
+def guard_counts(P, hidden=()):
+    if P.kind == 'Var':
+        return 0, 0
+    if P.kind == 'SP':
+        return infinity, 0 if key(P.args[0]) in [key(e) for e in hidden] else 1
+    if P.kind in ('Skip', 'Chaos'):
+        return infinity, 0
+    if P.kind in ('Stop', 'Miracle'):
+        return infinity, infinity
+    if P.kind == 'Seq':
+        (b1, d1), (b2, d2) = guard_counts(P.args[0], hidden), guard_counts(P.args[1], hidden)
+        return min(b1, d1 + b2), d1 + d2
+    if P.kind in ('EC', 'IC'):
+        (b1, d1), (b2, d2) = guard_counts(P.args[0], hidden), guard_counts(P.args[1], hidden)
+        return min(b1, b2), min(d1, d2)
+    if P.kind == 'Par':
+        # the trace of a parallel composition is at least as long as the traces of both sides
+        (b1, d1), (b2, d2) = guard_counts(P.args[1], hidden), guard_counts(P.args[2], hidden)
+        return min(b1, b2), max(d1, d2)
+    if P.kind == 'Hide':
+        return guard_counts(P.args[0], tuple(hidden) + tuple(P.args[1]))
+    if P.kind == 'Rec':
+        # the variables of an inner recursion count as the ones of the outer one
+        return min([guard_counts(B, hidden)[0] for v, B in P.args[1]]), 0
+    raise ValueError("unknown term " + P.kind)
+
+# the least number of visible events of a round of every recursion in some terms: the
+# observations of the traces shorter than round times it do not depend on the last rounds
+def guard_depth(ps):
+    depth = infinity
+    seen = set()
+    todo = list(ps)
+    while todo:
+        P = todo.pop()
+        if P in seen:
+            continue
+        seen.add(P)
+        if P.kind == 'Rec':
+            depth = min(depth, guard_counts(P)[0])
+            todo.extend([B for v, B in P.args[1]])
+        else:
+            todo.extend([a for a in P.args if isinstance(a, Term)])
+    return depth
+
+# the rounds of the recursion in some terms whose traces cover the diameter of the states of
+# a check by the explicit semantics of lts.py, the most events to one of them: every state is
+# reached by a trace within it, so is every violation. The states must be finite, see Prove();
+# the result of the explicit check too
+def covering_rounds(check, ps, budget):
+    import lts
+    depth = guard_depth(ps)
+    if depth == 0:
+        raise ValueError("the recursion is unguarded, so no rounds cover its traces")
+    explicit, space = lts.explore(check, ps, budget=budget)
+    if depth == infinity:
+        return 1, explicit
+    return space.diameter // depth + 1, explicit
+
+# a check of csp.py, e.g., Unfold('DLF', Rec('X', {'X': Seq(SP(a), Var('X'))}, None)), with the
+# recursion of the terms unfolded one more round at a time from start, in one context. Each
+# round is encoded afresh, but its processes grow linearly with the rounds, as the occurrences
+# of the recursion after an event share one process, see Encoding. A counterexample whose trace
+# is shorter than the rounds times the guard depth is one of the recursion without a bound and
+# stops the unfolding. Without a limit, the rounds go up to the ones whose traces cover the
+# states of the check, see covering_rounds(), so the other verdicts hold for all depths too;
+# with a limit, they hold for the traces shorter than the limit times the guard depth only
+def Unfold(check, *ps, start=1, limit=None, budget=100000):
+    if start < 1:
+        raise ValueError("the unfolding starts at round 1 or later, not " + str(start))
+    explicit = None
+    if limit is None:
+        rounds, explicit = covering_rounds(check, ps, budget)
+        limit = max(start, rounds)
+    elif limit < start:
+        raise ValueError("the limit %d is below the start %d" % (limit, start))
+    depth = guard_depth(ps)
+    with CheckContext():
+        for round in range(start, limit + 1):
+            result = getattr(csp, check)(*[encode(at_round(P, round)) for P in ps])
+            if result.verdict == 'unknown':
+                return result
+            if result.trace is not None and len(result.trace) < round * depth:
+                report("Found at round " + str(round))
+                return result
+    if explicit is not None and explicit.trace is not None:
+        # the counterexample of Z3 may be a longer one, or one of the truncation by Skip
+        return result.done('unknown', "No counterexample within " + str(limit) + " rounds, " +
+                           "the explicit semantics finds " + str(explicit.trace))
+    if result.trace is not None:
+        # the counterexample may be one of the truncation by Skip
+        return result.done('unknown', "No counterexample within " + str(limit) + " rounds")
+    if explicit is not None:
+        report("Holds for all depths, the states are covered by " + str(limit) + " rounds")
+    else:
+        report("Holds for the traces shorter than " + str(limit * depth) + " events")
+    return result
+
+
+############################################
+# the encoding
+############################################
+
+# the processes of the terms under one root. An occurrence of a term is encoded by the slot of
+# its position: an item for each Seq, Par and EC above it, whose operands an observation may
+# need together. The item of an EC is its side while the occurrence is reachable without
+# a visible event, as both sides are observed while they wait, and the same for both sides
+# after one, as one side is observed then. Two occurrences in the same slot are in the branches
+# of a choice of which an observation takes one, so they share one process.
+class Encoding:
+    def __init__(self):
+        self.processes = {}
+
+    # the process of an occurrence of P in a slot; unguarded holds the positions of the items
+    # of the ECs in the slot reached without a visible event, with the events hidden since
+    def encode(self, P, slot=(), unguarded=()):
+        k = (P, slot, key(unguarded))
+        if k not in self.processes:
+            self.processes[k] = self.build(P, slot, unguarded)
+        return self.processes[k]
+
+    def build(self, P, slot, unguarded):
+        if P.kind == 'Rec':
+            if P.args[2] is None:
+                raise ValueError("recursion without a bound is not supported by this semantics")
+            return self.encode(unfold(P), slot, unguarded)
+        if P.kind == 'Var':
+            raise ValueError("unbound variable " + P.args[0])
+        if not hasattr(csp, P.kind):
+            raise ValueError(P.kind + " is not supported by this semantics")
+        if not any([isinstance(a, Term) for a in P.args]):
+            return instance(primitive(P))
+
+        args = [list(a) if isinstance(a, tuple) else a for a in P.args]
+        if P.kind == 'Seq':
+            # the ECs whose items stay sides after the events of the first operand
+            after = tuple([(i, hidden) for i, hidden in unguarded if guard_counts(P.args[0], hidden)[1] == 0])
+            guarded = set([i for i, hidden in unguarded]) - set([i for i, hidden in after])
+            slot2 = tuple([('EC', None) if i in guarded else item for i, item in enumerate(slot)])
+            # the process of Q is of this occurrence only, so Seq uses it rather than an instance
+            return csp.Seq(self.encode(P.args[0], slot + (('Seq', 0),), unguarded),
+                           self.encode(P.args[1], slot2 + (('Seq', 1),), after), fresh=False)
+        if P.kind == 'Par':
+            args[1] = self.encode(P.args[1], slot + (('Par', 0),), unguarded)
+            args[2] = self.encode(P.args[2], slot + (('Par', 1),), unguarded)
+        elif P.kind == 'EC':
+            n = len(slot)
+            args = [self.encode(P.args[i], slot + (('EC', i),), unguarded + ((n, ()),)) for i in range(2)]
+        elif P.kind == 'Hide':
+            # the events hidden here are not visible to the ECs above
+            args[0] = self.encode(P.args[0], slot, tuple([(i, hidden + P.args[1]) for i, hidden in unguarded]))
+        else:
+            args = [self.encode(a, slot, unguarded) if isinstance(a, Term) else a for a in args]
+        return getattr(csp, P.kind)(*args)
+
+# the process of a term without sub-processes in the current context, defined once for
+# all its occurrences, see share()
+def primitive(P):
+    encoded = current_context().encoded
+    if P not in encoded:
+        combinator = getattr(csp, P.kind)
+        if P.args == ():
+            encoded[P] = share(instance(combinator))
+        else:
+            encoded[P] = share(combinator(*[list(a) if isinstance(a, tuple) else a for a in P.args]))
+    return encoded[P]
+
+# the process of a term in the current context; the processes of two calls are distinct, as
+# a check observes its operands together
+def encode(P):
+    return Encoding().encode(P)
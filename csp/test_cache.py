@@ -0,0 +1,59 @@
+# the keys of the persistent cache of the results, see cache.py
+
+import shutil
+from csp import *
+# after csp, whose init is the initial observation
+import cache
+import init
+import model
+from cache import Cached, cache_key
+
+P = Par([b], Seq(SP(a), SP(b)), Seq(SP(b), SP(c)))
+
+def test_hit(tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    with CheckContext():
+        first = Cached('DLF', P, path=path)
+        second = Cached('DLF', P, path=path)
+    assert first.verdict == second.verdict == 'deadlock free'
+    assert first.calls > 0 and second.calls == 0
+
+# the bound is read by the bounded and the seq encodings, through list_unrolled.py too
+def test_trace_bound(monkeypatch):
+    keys = {}
+    for encoding in ['list', 'bounded', 'seq']:
+        monkeypatch.setattr(init, 'trace_encoding', encoding)
+        for bound in [4, 6]:
+            monkeypatch.setattr(init, 'trace_bound', bound)
+            keys[encoding, bound] = cache_key('DLF', [P])
+    assert keys['list', 4] == keys['list', 6]
+    assert keys['bounded', 4] != keys['bounded', 6]
+    assert keys['seq', 4] != keys['seq', 6]
+    assert len(set(keys.values())) == 5
+
+# the processes of a model have the same expr as the ones of csp.py over other events
+def test_models(tmp_path):
+    ab = model.Alphabet('ab', ['a', 'b'])
+    ab2 = model.Alphabet('ab', ['a', 'b', 'c'])
+    processes = [SP(a), ab.SP(ab.a), ab2.SP(ab2.a)]
+    assert len(set([P.expr for P in processes])) == 1
+    assert len(set([cache_key('DLF', [P]) for P in processes])) == 3
+    path = str(tmp_path / 'cache.sqlite')
+    Q = ab.EC(ab.SP(ab.a), ab.SP(ab.b))
+    assert Cached('TRef', ab.SP(ab.a), Q, path=path).verdict == 'refined'
+    assert Cached('TRef', ab.SP(ab.a), Q, path=path).calls == 0
+
+# a change of the source of any module of the semantics misses the cache
+def test_semantics_version(tmp_path, monkeypatch):
+    for name in cache.semantics_modules:
+        shutil.copy(name, str(tmp_path / name))
+    monkeypatch.setattr(cache, '__file__', str(tmp_path / 'cache.py'))
+    versions = []
+    for name in ['list_unrolled.py', 'term.py', 'model.py']:
+        monkeypatch.setattr(cache, 'semantics', None)
+        before = cache.semantics_version()
+        with open(str(tmp_path / name), 'a') as f:
+            f.write('\n# changed\n')
+        monkeypatch.setattr(cache, 'semantics', None)
+        versions.append((before, cache.semantics_version()))
+    assert all([before != after for before, after in versions])
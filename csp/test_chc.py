@@ -0,0 +1,55 @@
+# the Horn clauses of chc.py against the explicit search of lts.py
+
+import random
+import pytest
+import chc
+import lts
+from lts import *
+
+events = [a, b, c]
+
+# a random term of some depth, its recursions without a bound
+def random_term(rand, depth):
+    if depth == 0:
+        return rand.choice([Skip, Stop, SP(a), SP(b), SP(c), Chaos])
+    kind = rand.choice(['SP', 'Seq', 'EC', 'IC', 'Par', 'Hide', 'Rec'])
+    if kind == 'SP':
+        return Seq(SP(rand.choice(events)), random_term(rand, depth - 1))
+    if kind == 'Par':
+        return Par(rand.sample(events, rand.randint(0, 2)), random_term(rand, depth - 1), random_term(rand, depth - 1))
+    if kind == 'Hide':
+        return Hide(random_term(rand, depth - 1), rand.sample(events, 1))
+    if kind == 'Rec':
+        return Rec('X', {'X': EC(Seq(SP(rand.choice(events)), Var('X')), random_term(rand, depth - 1))}, None)
+    return getattr(lts, kind)(random_term(rand, depth - 1), random_term(rand, depth - 1))
+
+# a recursion around a term, so that the network has cycles
+def recursion(rand, P):
+    return Rec('X', {'X': rand.choice([EC, IC])(Seq(SP(rand.choice(events)), Var('X')), P)}, None)
+
+# a trace of the Horn clauses is one of the term
+def is_trace(P, trace):
+    states, space = [P], LTS()
+    for e in trace:
+        states = [R1 for R in states for R1 in space.after(R, e)]
+    return states != []
+
+@pytest.mark.parametrize('seed', range(40))
+def test_random_networks(seed):
+    rand = random.Random(seed)
+    P = Par(rand.sample(events, rand.randint(0, 2)), recursion(rand, random_term(rand, 2)), recursion(rand, random_term(rand, 1)))
+    Q = recursion(rand, random_term(rand, 2))
+    for check in [('DLF', P), ('DVF', P), ('TRef', P, Q), ('SFRef', P, Q)]:
+        explicit, horn = chc.compare(*check)
+        assert explicit[0] == horn[0], check
+        if horn[1] is not None:
+            assert is_trace(P, horn[1]), check
+
+# the recursion grows the term, so the component has no finite automaton
+def test_budget():
+    P = Rec('X', {'X': EC(Seq(SP(a), Seq(Var('X'), SP(b))), SP(c))}, None)
+    assert chc.DLF(P, budget=200).verdict == 'unknown'
+    assert chc.DLF(Par([a], P, SP(a)), budget=200).verdict == 'unknown'
+    Q = Par([b], Seq(SP(a), SP(b)), Seq(SP(b), SP(c)))
+    assert chc.DLF(Q).verdict == 'deadlock free'
+    assert chc.DLF(Q, budget=2).verdict == 'unknown'
@@ -0,0 +1,21 @@
+# the sets of the models decoded as bitmasks, see finite_set.py
+
+from csp import *
+
+# the reports of the checks print a refusal as the list of its elements, as they did
+# before the sets were decoded as bitmasks
+def test_value_prints_as_elements():
+    for s in [Set.emptyset(), Set.toSet([a, c]), Set.fullset()]:
+        assert str(Set.value(s)) == str(Set.toElements(s))
+        assert list(Set.value(s)) == Set.toElements(s)
+
+def test_value_operations():
+    s1 = Set.value(Set.toSet([a, b]))
+    s2 = Set.value(Set.toSet([b, c]))
+    assert b in s1 and c not in s1
+    assert len(s1) == 2
+    assert s1 & s2 == Set.value(Set.toSet([b]))
+    assert s1 | s2 == Set.value(Set.toSet([a, b, c]))
+    assert s1 - s2 == Set.value(Set.toSet([a]))
+    assert s1 & s2 <= s1 and not s1 <= s2
+    assert Set.toElementsMany([Set.toSet([a, b]), Set.emptyset()]) == [[a, b], []]
@@ -0,0 +1,15 @@
+# the cone of influence of the queries, see init.py
+
+from conftest import run_checks
+from test_observations import e2
+
+# the axioms come in the order of the process ids whatever the order of the hashes,
+# the deadlock freedom of e2 was unknown on some runs of the list encoding
+def test_cone_is_deterministic():
+    script = ("import json, hashlib\nfrom csp import *\nwith CheckContext() as ctx:\n"
+              "    P = %s\n"
+              "    cone = hashlib.md5(str(ctx.cone([P])).encode()).hexdigest()\n"
+              "    print(json.dumps([cone, DLF(P).verdict]))\n" % e2)
+    results = [run_checks(script, 'list', seed) for seed in range(4)]
+    assert all(r == results[0] for r in results)
+    assert results[0][1] == 'deadlock free'
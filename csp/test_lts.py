@@ -0,0 +1,42 @@
+# the explicit-state semantics of lts.py against the Z3 one of csp.py
+
+import random
+import pytest
+import lts
+from lts import *
+
+events = [a, b, c]
+
+# a random term of some depth, with Hide twice as likely as the other operators so that
+# hidings are nested and composed in parallel
+def random_term(rand, depth):
+    if depth == 0:
+        return rand.choice([Skip, Stop, SP(a), SP(b), SP(c), Chaos])
+    kind = rand.choice(['SP', 'Seq', 'EC', 'IC', 'Par', 'Hide', 'Hide'])
+    if kind == 'SP':
+        return Seq(SP(rand.choice(events)), random_term(rand, depth - 1))
+    if kind == 'Par':
+        return Par(rand.sample(events, rand.randint(0, 2)), random_term(rand, depth - 1), random_term(rand, depth - 1))
+    if kind == 'Hide':
+        return Hide(random_term(rand, depth - 1), rand.sample(events, 1))
+    return getattr(lts, kind)(random_term(rand, depth - 1), random_term(rand, depth - 1))
+
+def checks(P, Q):
+    return [('DLF', P), ('DVF', P), ('TRef', P, Q), ('SFRef', P, Q), ('FDRef', P, Q)]
+
+@pytest.mark.parametrize('seed', range(12))
+def test_random_terms(seed):
+    rand = random.Random(seed)
+    P = Hide(random_term(rand, 2), [rand.choice(events)])
+    Q = Hide(random_term(rand, 2), [rand.choice(events)])
+    for check in checks(P, Q):
+        explicit, symbolic = compare(*check)
+        assert explicit == symbolic, check
+
+# each Hide has a trace of hidden events of its own, the nested ones shared it
+@pytest.mark.parametrize('check, P, Q, verdict', [
+    ('TRef', Hide(Hide(Seq(SP(b), SP(c)), [a]), [c]), Hide(Hide(Seq(SP(a), SP(a)), [a]), [b]), 'not refined'),
+    ('SFRef', Hide(Hide(EC(Skip, Stop), [b]), [b]), Hide(Hide(Hide(SP(c), [a]), [c]), [c]), 'refined'),
+])
+def test_nested_hiding(check, P, Q, verdict):
+    assert compare(check, P, Q) == (verdict, verdict)
@@ -0,0 +1,29 @@
+# the enumeration of the behaviours by observations(), see csp.py
+
+from conftest import run_checks
+from csp import *
+
+e2 = "Par([b], Seq(SP(a), SP(b)), Seq(SP(b), SP(c)))"
+
+failures = [[[], ['b', 'c', 'd']],
+            [['a'], ['a', 'c', 'd']],
+            [['a', 'b'], ['a', 'b', 'd']],
+            [['a', 'b', 'c'], ['a', 'b', 'c', 'd']]]
+
+def test_failures_of_prefixes():
+    with CheckContext():
+        result = ListAllTracesAndRefs(eval(e2))
+    assert sorted(result.stable) == failures
+    assert result.divergent == []
+
+def test_traces_of_prefixes():
+    with CheckContext():
+        assert sorted(iter_traces(eval(e2))) == [t for t, r in failures]
+
+# the refusals of a prefix the list encoding leaves unknown are found by the loop of the
+# traces; the order of the hashes changed which ones were lost
+def test_failures_of_prefixes_list_encoding():
+    script = ("import json\nfrom csp import *\nwith CheckContext():\n"
+              "    print(json.dumps(sorted(ListAllTracesAndRefs(%s).stable)))\n" % e2)
+    for seed in range(4):
+        assert run_checks(script, 'list', seed) == failures
@@ -0,0 +1,49 @@
+# the configurations of portfolio.py, whose workers import csp with their own encoding
+
+import json
+import os
+import subprocess
+import sys
+
+here = os.path.dirname(os.path.abspath(__file__))
+
+# a script importing term as a script calling Portfolio does, before its checks guarded by
+# __name__ == '__main__', so that each spawned worker imports it and csp again
+script = """import json
+import init
+init.trace_bound = 3
+import term
+from portfolio import Portfolio
+
+bounded = {'name': 'bounded', 'encoding': 'bounded', 'bound': 3, 'params': {}}
+listed = {'name': 'list', 'encoding': 'list', 'params': {}}
+# with the bound of the caller
+caller = {'name': 'caller', 'encoding': 'bounded', 'params': {}}
+
+if __name__ == '__main__':
+    # a deadlock after four events
+    P = term.Seq(term.SP(term.a), term.Seq(term.SP(term.b), term.Seq(term.SP(term.a), term.Seq(term.SP(term.b), term.Stop))))
+    results = [Portfolio('DLF', P, configs=configs) for configs in %s]
+    print(json.dumps([[r.verdict, r.config, r.trace, r.bound] for r in results]))
+"""
+
+def run_portfolio(tmp_path, configs):
+    path = tmp_path / 'checks.py'
+    path.write_text(script % configs)
+    env = dict(os.environ, PYTHONPATH=here)
+    out = subprocess.run([sys.executable, str(path)], cwd=str(tmp_path), env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+# the worker of the bounded configuration checks the traces of at most three events, not the
+# ones of the encoding of csp imported by the script
+def test_encoding_of_configuration(tmp_path):
+    results = run_portfolio(tmp_path, '[[bounded], [listed], [caller]]')
+    assert results == [['deadlock free', 'bounded', None, 3], ['deadlock', 'list', ['a', 'b', 'a', 'b'], None],
+                       ['deadlock free', 'caller', None, 3]]
+
+# the deadlock free verdict of the bounded configuration only holds for the traces of at most
+# three events, so it does not win against the deadlock found by the list one
+def test_bounded_verdicts(tmp_path):
+    results = run_portfolio(tmp_path, '[[bounded, listed], [listed, bounded]]')
+    assert results == [['deadlock', 'list', ['a', 'b', 'a', 'b'], None]] * 2
@@ -0,0 +1,117 @@
+#####################################################
+## Benchmarks for the assignments
+## run: python benchmarks.py
+#####################################################
+
+import timeit
+from vcsp import *
+
+
+#####################################################
+## assignments and guards over many local variables
+## the constraints of n assignments x_i := x_{i-1}+x_i+1
+## over variables of a datatype of m integers, built from
+## Z3 terms over the handles with the frame as an update
+## of the tuple (current), with the frame as one equality
+## per variable (equalities), from strings read once
+## (strings) and by the former replacement of the names
+## in strings and eval (before)
+#####################################################
+
+# observations of a datatype of m integer variables x000, x001, ...; the names have
+# the same length, as the former replacement breaks a name which prefixes another
+def many_variables(m):
+    V = Datatype('ManyVar')
+    V.declare('ManyTuple', *[('x%03d' % i, IntSort()) for i in range(m)])
+    V = V.create()
+    W = Datatype('ManyVariables')
+    W.declare('ManyObservation', ('loc', V))
+    W = W.create()
+    return V, W
+
+# the former constraints of an assignment, in the names of a dictionary
+def replaced_assignment(names, v, expr):
+    for i in range(len(names)):
+        expr = expr.replace(names[i], names[i] + '(loc(iv))')
+    constraints = ''
+    for i in range(len(names)):
+        if names[i] != v:
+            constraints = constraints + ',' + names[i] + '(loc(fv))==' + names[i] + '(loc(iv))'
+    return 'And(' + v + '(loc(fv))==' + expr + ',' + constraints[1:] + ')'
+
+# the right-hand sides of n assignments over the variables
+def right_hand_sides(vs, n):
+    m = len(vs.names)
+    x = [vs.handles[i] for i in vs.names]
+    rhs = [(vs.names[k], x[k - 1] + x[k] + 1) for k in range(1, m)]
+    return (rhs * (n // len(rhs) + 1))[:n]
+
+def assignment_times(sizes, n=200):
+    print("%6s %10s %10s %10s %10s" % ('vars', 'current', 'equalities', 'strings', 'before'))
+    for m in sizes:
+        V, W = many_variables(m)
+        iv_m = Const('iv', W)
+        fv_m = Const('fv', W)
+        vs = StateVars(V, W.loc, iv_m)
+        rhs = right_hand_sides(vs, n)
+
+        def current():
+            return [vs.update(fv_m, iv_m, {v: substitute(e, *vs.initial)}) for v, e in rhs]
+
+        def equalities():
+            return [And([vs.value(v, fv_m) == substitute(e, *vs.initial)] +
+                        [vs.value(i, fv_m) == vs.value(i, iv_m) for i in vs.names if i != v]) for v, e in rhs]
+
+        strings = [(v, str(e)) for v, e in rhs]
+        namespace = dict(vars(z3))
+        namespace.update(vs.handles)
+        def read():
+            return [vs.update(fv_m, iv_m, {v: substitute(eval(e, namespace), *vs.initial)}) for v, e in strings]
+
+        # the former names: the accessors, loc and the observations
+        former = dict(vars(z3))
+        former.update(vs.accessors)
+        former.update({'loc': W.loc, 'iv': iv_m, 'fv': fv_m})
+        def before():
+            return [eval(replaced_assignment(vs.names, v, e), former) for v, e in strings]
+
+        print("%6d %10.3f %10.3f %10.3f %10.3f" % (m, timeit.timeit(current, number=1), timeit.timeit(equalities, number=1),
+                                                    timeit.timeit(read, number=1), timeit.timeit(before, number=1)))
+
+
+#####################################################
+## solving a sequence of assignments
+## n assignments from an initial tuple of m variables,
+## each from the observation of the last one, with the
+## frame as an update of the tuple (current) or as one
+## equality per variable (equalities)
+#####################################################
+
+def sequence_times(sizes, n=100):
+    print("%6s %10s %10s" % ('vars', 'current', 'equalities'))
+    for m in sizes:
+        V, W = many_variables(m)
+        os = [Const('o_%d' % k, W) for k in range(n + 1)]
+        vs = StateVars(V, W.loc, os[0])
+        rhs = right_hand_sides(vs, n)
+
+        def solve(frame):
+            s = Solver()
+            s.add(os[0] == W.ManyObservation(V.constructor(0)(*[IntVal(0)] * m)))
+            for k, (v, e) in enumerate(rhs):
+                s.add(frame(os[k + 1], os[k], v, substitute(e, *vs.values(os[k]))))
+            s.add(vs.value(rhs[-1][0], os[n]) < 0)
+            return timeit.timeit(lambda: s.check(), number=1)
+
+        def current(o1, o, v, e):
+            return vs.update(o1, o, {v: e})
+
+        def equalities(o1, o, v, e):
+            return And([vs.value(v, o1) == e] + [vs.value(i, o1) == vs.value(i, o) for i in vs.names if i != v])
+
+        print("%6d %10.3f %10.3f" % (m, solve(current), solve(equalities)))
+
+
+if __name__ == '__main__':
+    assignment_times([10, 50, 100])
+    sequence_times([10, 50, 100])
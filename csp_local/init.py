@@ -1,5 +1,80 @@
-from z3 import *
-
-default_solver = Solver()
-#global_process_index = Int('index')
-global_process_index = 0
+from z3 import *
+
+#global_process_index = Int('index')
+global_process_index = 0
+
+# the schema of the state variables of the model whose copy of vcsp.py is being
+# loaded, see schema.py, or None for the variables declared in the files
+state_schema = None
+
+###########################################################
+## Check contexts
+## A context owns its own solver and a registry of the processes
+## built in it. Processes only add their axioms to the context that
+## is current when they are created, so a context can be thrown away
+## and a new check starts with a clean solver.
+##
+## with CheckContext() as ctx:
+##     P = EC(SP(a), SP(b))
+##     DLF(P)
+###########################################################
+
+# background definitions (list functions and the primitive processes)
+# which every context needs; they are added to each new solver
+background_axioms = []
+
+# names of all functions applied in an expression
+def applied_names(e):
+    names = set()
+    seen = set()
+    todo = [e]
+    while todo:
+        t = todo.pop()
+        if t.get_id() in seen:
+            continue
+        seen.add(t.get_id())
+        if is_quantifier(t):
+            todo.append(t.body())
+        elif is_app(t):
+            names.add(t.decl().name())
+            todo.extend(t.children())
+    return names
+
+class CheckContext:
+    def __init__(self):
+        self.solver = Solver()
+        self.processes = {}
+        for axiom in background_axioms:
+            self.solver.add(axiom)
+
+    def add(self, *constraints):
+        self.solver.add(*constraints)
+
+    def register(self, P):
+        self.processes[P.id] = P
+
+    # processes of this context or the shared primitives of the default one
+    def lookup(self, id):
+        if id in self.processes:
+            return self.processes[id]
+        return default_context.processes[id]
+
+    def __enter__(self):
+        context_stack.append(self)
+        return self
+
+    def __exit__(self, *args):
+        context_stack.pop()
+
+default_context = CheckContext()
+default_solver = default_context.solver
+
+context_stack = [default_context]
+
+def current_context():
+    return context_stack[-1]
+
+# add a background definition into the default context and every context created later
+def define(axiom):
+    background_axioms.append(axiom)
+    default_context.add(axiom)
@@ -0,0 +1,106 @@
+##########################################################
+## Declarative schema of the local and shared variables
+## A model declares its local and shared variables and their
+## types at runtime instead of editing LocalVar and GlobalVar
+## in vcsp.py. Each model loads its own copy of vcsp.py
+## whose Variables hold tuples of its variables only, so the
+## models coexist in one interpreter and none pays for the
+## variables of the others. The types are Integer(), Boolean(), Bits(w), a
+## bit-vector of w bits, and Bounded(lo, hi), the integers
+## from lo to hi as signed bit-vectors of the least width
+## holding them: their guards use bit-vector reasoning.
+## The initial values of the checks are in the ranges, and
+## an assignment of a value out of its range diverges, e.g.,
+## lx := 5 ; lx := lx+1 with Bounded(0, 5) has the divergent
+## trace <> only.
+##
+## m = DeclareModel('counter', [('lx', Bounded(0, 7))], [('gx', Integer())])
+## P = m.GPar([], m.SGAssign(ga, 'gx', 'gx+1'), m.GGuard(gb, 'gx>0', m.SP(a)))
+## m.ListAllTraces(P)
+##
+## The processes of a model are only combined by the
+## operators of the same model.
+##########################################################
+
+from z3 import *
+import importlib.util
+import os
+import init
+
+
+class Integer:
+    def sort(self):
+        return IntSort()
+
+    def domain(self):
+        return None
+
+class Boolean:
+    def sort(self):
+        return BoolSort()
+
+    def domain(self):
+        return None
+
+class Bits:
+    def __init__(self, width):
+        self.width = width
+
+    def sort(self):
+        return BitVecSort(self.width)
+
+    def domain(self):
+        return None
+
+class Bounded:
+    def __init__(self, lo, hi):
+        assert(lo <= hi)
+        self.lo = lo
+        self.hi = hi
+        # the least width of the signed bit-vectors from lo to hi
+        self.width = 1
+        while lo < -2 ** (self.width - 1) or hi >= 2 ** (self.width - 1):
+            self.width += 1
+
+    def sort(self):
+        return BitVecSort(self.width)
+
+    # the constraint of a value in the range, by the signed comparisons of bit-vectors
+    def domain(self):
+        return lambda e: And(BitVecVal(self.lo, self.width) <= e, e <= BitVecVal(self.hi, self.width))
+
+
+# a datatype of a tuple of typed variables, with the domains of the bounded ones
+def declare_tuple(name, constructor, variables):
+    assert(len(variables) > 0)
+    V = Datatype(name)
+    V.declare(constructor, *[(n, t.sort()) for n, t in variables])
+    V = V.create()
+    return V, dict([(n, t.domain()) for n, t in variables if t.domain() is not None])
+
+class Schema:
+    def __init__(self, name, local, shared):
+        self.name = name
+        self.LocalVar, self.local_domains = declare_tuple('LocalVar_' + name, 'LocalTuple_' + name, local)
+        self.GlobalVar, self.global_domains = declare_tuple('GlobalVar_' + name, 'GlobalTuple_' + name, shared)
+
+
+here = os.path.dirname(os.path.abspath(__file__))
+
+# the operators, checks and variables of a model of some local and shared variables, lists
+# of their names and types, as a module of its own
+def DeclareModel(name, local, shared):
+    schema = Schema(name, local, shared)
+    init.state_schema = schema
+    try:
+        spec = importlib.util.spec_from_file_location('vcsp_' + name, os.path.join(here, 'vcsp.py'))
+        model = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(model)
+    finally:
+        init.state_schema = None
+    # the accessors of the variables, e.g., m.lx(loc(fv)) or m.gx(glo(fv))
+    for V in [schema.LocalVar, schema.GlobalVar]:
+        for i in range(V.constructor(0).arity()):
+            setattr(model, V.accessor(0, i).name(), V.accessor(0, i))
+    model.schema = schema
+    return model
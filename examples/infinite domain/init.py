@@ -1,5 +1,5 @@
-from z3 import *
-
-default_solver = Solver()
-#global_process_index = Int('index')
-global_process_index = 0
+from z3 import *
+
+default_solver = Solver()
+#global_process_index = Int('index')
+global_process_index = 0